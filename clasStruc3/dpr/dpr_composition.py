@@ -0,0 +1,169 @@
+import numpy as np
+
+from dpr.dpr_power import traction_energy_array
+from dpr.dpr_train import TrainsRequirement, headway_array, trains_array, year_array
+
+
+GRAVITY = 9.81  # m/s²
+MOTOR_CARS = {'DMC', 'MC'}
+
+
+class CompositionOptimiser:
+    def __init__(self, capacity_info, phpdt_dict, params, tare_dict, power, years,
+                 lengths=(3, 4, 6, 8), min_headway=2.0, train_params=None, adhesion=0.18):
+        """
+        Compares candidate train compositions over the forecast years.
+
+        Parameters:
+            capacity_info (dict): Coach capacities for "Dmc" and "Tc", as for TrainsRequirement.
+            phpdt_dict (dict): Year-wise PHPDT values.
+            params (dict): average_speed, section_length and reversal_time.
+            tare_dict (dict): Tare weights per coach type and passenger weight.
+            power (dict): Traction power parameters (SEC, Regen, DepotTP, TrLoss, TrPF).
+            years (list): Forecast years.
+            lengths (tuple): Train lengths (cars) to enumerate.
+            min_headway (float): Shortest headway (min) the signalling allows.
+            train_params (dict): Train parameters of the speed simulation
+                (Acceleration_rate_1, Starting_resistance, Inertia_mass_m,
+                Inertia_mass_t) for the adhesion check.
+            adhesion (float): Adhesion coefficient of the powered axles.
+
+        Candidates have a DMC at each end and TC/MC cars in between. Only the
+        coach counts affect capacity, weight and traction, so each mix is
+        evaluated once and remembered.
+
+        An MC adds a TC's capacity at a DMC's tare, so only traction can
+        justify it: a candidate is feasible only if the adhesion of its motor
+        cars (DMC, MC) at AW4 can start the train at Acceleration_rate_1,
+        see adhesion_margin().
+        """
+        self.capacity_info = capacity_info
+        self.phpdt_dict = phpdt_dict
+        self.params = params
+        self.tare_dict = tare_dict
+        self.power = power
+        self.years = list(years)
+        self.lengths = lengths
+        self.min_headway = min_headway
+        self.train_params = train_params
+        self.adhesion = adhesion
+        self._coach_cache = {}
+
+    @classmethod
+    def from_inputs(cls, inputs, **kwargs):
+        """Build from the output of read_all_inputs."""
+        return cls(inputs['train_info'], inputs['phpdt'], inputs['params'],
+                   inputs['tare'], inputs['power'], inputs['years'],
+                   train_params=inputs['params_speed'], **kwargs)
+
+    def candidates(self):
+        """Compositions as coach lists, e.g. ['DMC', 'MC', 'TC', 'DMC']."""
+        compositions = []
+        for length in self.lengths:
+            middle = length - 2
+            if middle < 0:
+                continue
+            for motors in range(middle + 1):
+                compositions.append(['DMC'] + ['MC'] * motors
+                                    + ['TC'] * (middle - motors) + ['DMC'])
+        return compositions
+
+    def coach_figures(self, composition):
+        """
+        AW3 capacity, AW4 capacity, AW4 train weight and adhesion margin,
+        per coach mix.
+        """
+        key = tuple(sorted(composition))
+        if key not in self._coach_cache:
+            train = TrainsRequirement(self.capacity_info, self.phpdt_dict, self.params,
+                                      self.tare_dict, list(composition))
+            capacity_aw4 = train.compute_capacity('AW4')
+            weight, axle_loads = train.compute_aw4_weights(capacity_aw4)
+            self._coach_cache[key] = (train.compute_capacity('AW3'), capacity_aw4, weight,
+                                      self.adhesion_margin(composition, axle_loads))
+        return self._coach_cache[key]
+
+    def adhesion_margin(self, composition, axle_loads):
+        """
+        Tractive effort the motor cars' adhesion allows at AW4 over the
+        effort needed to start the train at Acceleration_rate_1 (with the
+        rotating mass allowance and starting resistance). Below 1 the
+        composition cannot reach the design acceleration; without train
+        parameters the margin is infinite.
+        """
+        params = self.train_params
+        if not params:
+            return np.inf
+        rate = float(params.get('Acceleration_rate_1', 0.0))
+        needed = available = 0.0
+        for car in composition:
+            weight = axle_loads[car] * 4  # t
+            motor = car in MOTOR_CARS
+            inertia = float(params.get('Inertia_mass_m' if motor else 'Inertia_mass_t', 0.0))
+            needed += weight * (rate * (1 + inertia) + float(params.get('Starting_resistance', 0.0)) / 1000)
+            if motor:
+                available += weight * self.adhesion * GRAVITY
+        return available / needed if needed else np.inf
+
+    def evaluate(self, compositions=None):
+        """
+        Evaluate compositions for every year in one batch. Returns one row
+        per composition with its year-wise headway, rakes and effective
+        traction energy (MW), the horizon fleet (`rakes`, the most rakes
+        needed in any year, and `fleet_cars`, the cars of those rakes), the
+        summed energy, the number of years whose headway is below the
+        signalling minimum and the adhesion margin (feasible when at least 1).
+        """
+        compositions = self.candidates() if compositions is None else compositions
+        figures = np.array([self.coach_figures(c) for c in compositions], dtype=float)
+        capacity, weight = figures[:, 0:1], figures[:, 2:3]
+        phpdt = year_array(self.phpdt_dict, self.years)[None, :]
+        params, power = self.params, self.power
+
+        headway = headway_array(phpdt, capacity)
+        trains = trains_array(headway, params['section_length'],
+                              params['average_speed'], params['reversal_time'])
+        _, energy = traction_energy_array(
+            headway, params['section_length'], weight, power['SEC'], power['Regen'],
+            power['DepotTP'], power['TrLoss'], power['TrPF'])
+        infeasible = np.sum(~(headway >= self.min_headway), axis=1)
+
+        rows = []
+        for i, composition in enumerate(compositions):
+            rows.append({
+                'composition': ','.join(composition),
+                'cars': len(composition),
+                'capacity': int(figures[i, 0]),
+                'capacity_aw4': int(figures[i, 1]),
+                'train_weight': figures[i, 2],
+                'headway': dict(zip(self.years, headway[i].tolist())),
+                'trains': dict(zip(self.years, trains[i].tolist())),
+                'energy': dict(zip(self.years, energy[i].tolist())),
+                'rakes': float(np.nanmax(trains[i])),
+                'fleet_cars': float(np.nanmax(trains[i])) * len(composition),
+                'energy_total': round(float(np.nansum(energy[i])), 2),
+                'infeasible_years': int(infeasible[i]),
+                'adhesion_margin': round(float(figures[i, 3]), 3),
+            })
+        return rows
+
+    @staticmethod
+    def pareto_front(rows, objectives=('fleet_cars', 'energy_total', 'infeasible_years')):
+        """Rows not dominated on the objectives (all minimised)."""
+        values = np.array([[row[key] for key in objectives] for row in rows], dtype=float)
+        no_worse = (values[:, None, :] <= values[None, :, :]).all(axis=2)
+        better = (values[:, None, :] < values[None, :, :]).any(axis=2)
+        dominated = (no_worse & better).any(axis=0)
+        front = [row for row, d in zip(rows, dominated) if not d]
+        return sorted(front, key=lambda row: [row[key] for key in objectives])
+
+    def optimise(self, objectives=('fleet_cars', 'energy_total', 'infeasible_years')):
+        """
+        Evaluate every candidate and return the Pareto front of those whose
+        motor cars can reach the design acceleration. The default objectives
+        trade the cars to procure (the capital cost) against traction energy
+        and headway feasibility; rakes alone would favour the longest trains
+        whatever their car count.
+        """
+        rows = [row for row in self.evaluate() if row['adhesion_margin'] >= 1]
+        return self.pareto_front(rows, objectives) if rows else []
@@ -0,0 +1,155 @@
+import numpy as np
+
+class FleetPowerTimeline:
+    def __init__(self, trip_time, trip_power, operating_hours, directions=2, reverse=None):
+        """
+        Builds the whole-day system power timeline by overlaying the
+        simulated trip power trace on every departure of the operating day.
+
+        Parameters:
+            trip_time (array): Logged times of the simulated trip (s).
+            trip_power (array): Logged power of the trip (W), negative when regenerating.
+            operating_hours (float): Hours of service per day.
+            directions (int): Number of directions run, departing evenly out
+                of phase.
+            reverse (tuple): Optional (time, power) of the trip simulated in
+                the opposite direction. Every other direction runs this trace;
+                without it, all directions run the forward trace.
+
+        The trip is resampled to 1 s bins (preserving energy), and the day is
+        the convolution of the departure pattern with the trace, evaluated
+        for all departures at once through the FFT.
+        """
+        self.operating_hours = operating_hours
+        self.directions = directions
+        self.traces = [self._resample(trip_time, trip_power)]
+        if reverse is not None:
+            self.traces.append(self._resample(*reverse))
+        # One length for all traces, so the day timelines add up
+        length = max(len(trace[0]) for trace in self.traces)
+        self.traces = [[np.pad(part, (0, length - len(part))) for part in trace]
+                       for trace in self.traces]
+        self.traction, self.regen = self.traces[0]
+
+    @staticmethod
+    def _resample(trip_time, trip_power):
+        """Split the trace into traction and regeneration, averaged per second."""
+        time = np.asarray(trip_time, dtype=float)
+        time = time - time[0]
+        power = np.asarray(trip_power, dtype=float)
+        grid = np.arange(0, np.ceil(time[-1]) + 1)
+
+        traces = []
+        for part in (np.clip(power, 0, None), np.clip(power, None, 0)):
+            energy = np.concatenate(
+                [[0.0], np.cumsum((part[1:] + part[:-1]) / 2 * np.diff(time))])
+            traces.append(np.diff(np.interp(grid, time, energy)))
+        return traces
+
+    def departures(self, headway, trace=None):
+        """
+        Departure count per second of the operating day for a headway (min).
+        The directions depart evenly out of phase (half a headway apart for
+        two), not all at the same instants. With `trace`, only the directions
+        running that trace (index into self.traces) are counted.
+        """
+        day = int(self.operating_hours * 3600)
+        counts = np.zeros(day)
+        if headway and headway > 0:
+            step = headway * 60
+            for k in range(self.directions):
+                if trace is not None and k % len(self.traces) != trace:
+                    continue
+                times = np.arange(step * k / self.directions, day, step)
+                np.add.at(counts, np.round(times).astype(int).clip(0, day - 1), 1)
+        return counts
+
+    def _convolve(self, counts, traces):
+        n = len(counts) + len(traces[0]) - 1
+        nfft = 1 << (n - 1).bit_length()
+        spectrum = np.fft.rfft(counts, nfft)
+        return [np.fft.irfft(spectrum * np.fft.rfft(trace, nfft), nfft)[:n]
+                for trace in traces]
+
+    def timeline(self, headway):
+        """
+        1 s system traction and regeneration power (W) over the day for a
+        given headway (min).
+        """
+        traction, regen = 0, 0
+        for index, trace in enumerate(self.traces):
+            day = self._convolve(self.departures(headway, index), trace)
+            traction, regen = traction + day[0], regen + day[1]
+        return traction, regen
+
+    @staticmethod
+    def rolling_max(power, window=900):
+        """Maximum of the `window`-second moving average (default 15 min)."""
+        if len(power) <= window:
+            return float(np.mean(power)) if len(power) else 0.0
+        cumulative = np.concatenate([[0.0], np.cumsum(power)])
+        return float(np.max(cumulative[window:] - cumulative[:-window]) / window)
+
+    def compute_peak_demand(self, yearly_headways, window=900):
+        """
+        Peak and rolling maximum traction demand (MW) of the fleet per year.
+        """
+        demand = {}
+        for year, headway in yearly_headways.items():
+            if not headway or headway <= 0:
+                demand[year] = None
+                continue
+            traction, _ = self.timeline(headway)
+            demand[year] = {
+                'peak': round(float(traction.max()) / 1e6, 2),
+                'max_demand': round(self.rolling_max(traction, window) / 1e6, 2),
+            }
+        return demand
+
+    def demand_array(self, headway, points=50, window=900):
+        """
+        Rolling maximum fleet traction demand (MW) for an array of headways
+        (min), NaN where the headway is missing. The demand is measured at
+        `points` headways spanning the array, evenly spaced in trains per
+        hour, and interpolated in between.
+        """
+        headway = np.asarray(headway, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frequency = np.where(headway > 0, 1 / headway, np.nan)
+        if np.isnan(frequency).all():
+            return frequency
+        grid = np.linspace(np.nanmin(frequency), np.nanmax(frequency), points)
+        demand = self.compute_peak_demand(dict(enumerate(1 / grid)), window)
+        measured = [demand[k]['max_demand'] for k in range(points)]
+        return np.interp(frequency, grid, measured)
+
+    def compute_regen_sharing(self, yearly_headways):
+        """
+        Regenerative braking energy actually absorbed by other trains.
+
+        At every second of the day the regenerated power can only feed
+        trains drawing traction power at the same moment; the remainder is
+        lost (e.g. in braking resistors). Returns per year the daily traction,
+        regenerated, absorbed and net energy (MWh) and the receptivity
+        (absorbed / regenerated).
+        """
+        sharing = {}
+        for year, headway in yearly_headways.items():
+            if not headway or headway <= 0:
+                sharing[year] = None
+                continue
+            traction, regen = self.timeline(headway)
+            # Clip FFT round-off around zero
+            traction = np.clip(traction, 0, None)
+            regen = np.clip(-regen, 0, None)
+            absorbed = np.minimum(traction, regen)
+            regen_mwh = float(regen.sum()) / 3.6e9
+            absorbed_mwh = float(absorbed.sum()) / 3.6e9
+            sharing[year] = {
+                'traction': round(float(traction.sum()) / 3.6e9, 2),
+                'regen': round(regen_mwh, 2),
+                'absorbed': round(absorbed_mwh, 2),
+                'net': round(float((traction - absorbed).sum()) / 3.6e9, 2),
+                'receptivity': round(absorbed_mwh / regen_mwh, 3) if regen_mwh > 0 else None,
+            }
+        return sharing
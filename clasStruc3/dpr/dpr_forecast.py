@@ -0,0 +1,147 @@
+import csv
+
+import numpy as np
+
+from dpr.dpr_power import (effective_demand_array, max_demand_array, total_energy_array,
+                           traction_energy_array)
+from dpr.dpr_train import headway_array, trains_array, year_array
+
+METHODS = ('linear', 'cagr')
+COLUMNS = ('year', 'daily_ridership', 'phpdt', 'headway', 'trains',
+           'traction_mw', 'aux_mw', 'total_units', 'max_demand')
+# Columns holding whole numbers (years, passengers, trains, MW rounded up)
+COUNT_COLUMNS = {'year', 'daily_ridership', 'phpdt', 'trains', 'max_demand'}
+
+
+def interpolate_years(values, method='linear'):
+    """
+    Year-keyed values (e.g. {'2030': 6790, '2045': 12000}) at every year
+    from the first to the last horizon year. 'linear' interpolates the
+    values, 'cagr' grows them at a constant annual rate between horizon
+    years. Returns (years, values) as arrays.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown interpolation method: {method}")
+    horizon = sorted(values, key=int)
+    known_years = np.array([int(year) for year in horizon], dtype=float)
+    known = year_array(values, horizon)
+    years = np.arange(int(known_years[0]), int(known_years[-1]) + 1)
+    if method == 'linear':
+        return years, np.interp(years, known_years, known)
+    with np.errstate(divide='ignore'):
+        return years, np.exp(np.interp(years, known_years, np.log(known)))
+
+
+def procurement_steps(years, trains):
+    """
+    Years in which the fleet must grow: the first year's fleet and every
+    later year needing more rakes than any year before, as
+    [{'year': .., 'rakes': .., 'added': ..}].
+    """
+    steps = []
+    fleet = 0
+    for year, needed in zip(np.asarray(years).tolist(), np.asarray(trains).tolist()):
+        if np.isnan(needed) or needed <= fleet:
+            continue
+        steps.append({'year': year, 'rakes': int(needed), 'added': int(needed) - fleet})
+        fleet = int(needed)
+    return steps
+
+
+class AnnualForecast:
+    def __init__(self, phpdt, daily_ridership, train_capacity, params, train_weight,
+                 power, working, aux_mw, method='linear', fleet=None):
+        """
+        DPR train and energy figures for every year of the horizon.
+
+        Parameters:
+            phpdt (dict): PHPDT for the horizon years.
+            daily_ridership (dict): Daily ridership for the horizon years.
+            train_capacity (float): Train capacity (AW3) used for headways.
+            params (dict): average_speed, section_length and reversal_time.
+            train_weight (float): AW4 train weight (t).
+            power (dict): Traction power parameters (SEC, Regen, DepotTP, TrLoss, TrPF, DF).
+            working (dict): Working 'Hours' and 'Days'.
+            aux_mw (dict): Effective auxiliary power (MW) for the horizon years.
+            method (str): 'linear' or 'cagr' interpolation between horizon years.
+            fleet (FleetPowerTimeline): Fleet of the simulated trip. With it,
+                max demand is the fleet demand measured at every year's
+                headway, as in the DPR report; without it, max demand is the
+                estimate from the SEC formula, which is lower.
+
+        Horizon years give the DPR table's headway, trains and energy, and
+        with a fleet also its max demand.
+        """
+        self.phpdt = phpdt
+        self.daily_ridership = daily_ridership
+        self.train_capacity = train_capacity
+        self.params = params
+        self.train_weight = train_weight
+        self.power = power
+        self.working = working
+        self.aux_mw = aux_mw
+        self.method = method
+        self.fleet = fleet
+
+    @classmethod
+    def from_inputs(cls, inputs, traffic_data, energy_data, **kwargs):
+        """Build from the outputs of read_all_inputs and compute_traffic_and_energy."""
+        return cls(inputs['phpdt'], inputs['daily_ridership'], traffic_data['capacity'],
+                   inputs['params'], traffic_data['train_weight'], inputs['power'],
+                   inputs['working'], energy_data['aux_eff'], **kwargs)
+
+    def compute(self):
+        """Year-wise figures as arrays keyed by COLUMNS, all years in one pass."""
+        params, power = self.params, self.power
+        years, phpdt = interpolate_years(self.phpdt, self.method)
+        _, ridership = interpolate_years(self.daily_ridership, self.method)
+        _, aux_mw = interpolate_years(self.aux_mw, 'linear')
+        phpdt = np.round(phpdt)
+
+        headway = headway_array(phpdt, self.train_capacity)
+        trains = trains_array(headway, params['section_length'],
+                              params['average_speed'], params['reversal_time'])
+        _, traction = traction_energy_array(
+            headway, params['section_length'], self.train_weight, power['SEC'],
+            power['Regen'], power['DepotTP'], power['TrLoss'], power['TrPF'])
+        units = total_energy_array(traction, aux_mw, self.working['Hours'],
+                                   self.working['Days'], power['DF'])
+        demand = traction if self.fleet is None else self.fleet_demand(headway)
+
+        return {
+            'year': years,
+            'daily_ridership': np.round(ridership),
+            'phpdt': phpdt,
+            'headway': headway,
+            'trains': trains,
+            'traction_mw': traction,
+            'aux_mw': aux_mw,
+            'total_units': units,
+            'max_demand': max_demand_array(demand, aux_mw),
+        }
+
+    def fleet_demand(self, headway):
+        """Measured fleet traction demand at the supply (MW) for each headway."""
+        power = self.power
+        served = {i: h for i, h in enumerate(headway.tolist()) if h > 0}
+        measured = self.fleet.compute_peak_demand(served)
+        traction = np.array([measured[i]['max_demand'] if i in measured else np.nan
+                             for i in range(len(headway))])
+        return effective_demand_array(traction, power['DepotTP'], power['TrLoss'], power['TrPF'])
+
+    def procurement(self, table=None):
+        """Rake procurement steps, see procurement_steps()."""
+        table = self.compute() if table is None else table
+        return procurement_steps(table['year'], table['trains'])
+
+    @staticmethod
+    def write_csv(path, table):
+        """Write the year-wise table as CSV, one row per year."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            for row in zip(*(table[name].tolist() for name in COLUMNS)):
+                writer.writerow([
+                    '' if np.isnan(value) else int(value) if name in COUNT_COLUMNS else value
+                    for name, value in zip(COLUMNS, row)
+                ])
@@ -0,0 +1,115 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dpr.dpr_power import effective_demand_array, max_demand_array, traction_energy_array
+from dpr.dpr_train import headway_array, trains_array
+
+
+def _run_shard(model, seed, size):
+    """Sample and evaluate one shard (module level so process pools can run it)."""
+    return model.evaluate(model.sample(size, np.random.default_rng(seed)))
+
+
+class RidershipMonteCarlo:
+    def __init__(self, years, phpdt, train_capacity, params, train_weight,
+                 power, aux_mw, sigma=0.15, correlation=0.8, fleet=None):
+        """
+        Monte Carlo of forecast uncertainty through the train requirement
+        and energy calculations.
+
+        Parameters:
+            years (list): Forecast years.
+            phpdt (dict): Year-wise PHPDT forecast (the median of each sample).
+            train_capacity (float): Train capacity (AW3) used for headways.
+            params (dict): average_speed, section_length and reversal_time.
+            train_weight (float): AW4 train weight (t).
+            power (dict): Traction power parameters (SEC, Regen, DepotTP, TrLoss, TrPF).
+            aux_mw (dict): Year-wise effective auxiliary power (MW).
+            sigma (float): Standard deviation of the log forecast error.
+            correlation (float): Correlation of the log errors of consecutive
+                years; years further apart are correlated by correlation**k.
+            fleet (FleetPowerTimeline): Fleet of the simulated trip. With it,
+                max demand is the measured fleet demand, as in the DPR report
+                (see FleetPowerTimeline.demand_array); without it, max demand
+                is the estimate from the SEC formula.
+
+        Each sample scales the whole forecast by correlated lognormal factors,
+        so a high first year tends to come with high later years.
+        """
+        self.years = list(years)
+        self.phpdt = np.array([float(phpdt[year]) for year in self.years])
+        self.train_capacity = train_capacity
+        self.params = params
+        self.train_weight = train_weight
+        self.power = power
+        self.aux_mw = np.array([float(aux_mw[year]) for year in self.years])
+        self.fleet = fleet
+
+        lag = np.abs(np.subtract.outer(np.arange(len(self.years)), np.arange(len(self.years))))
+        self.covariance = sigma**2 * correlation**lag
+        self.cholesky = np.linalg.cholesky(self.covariance)
+
+    @classmethod
+    def from_inputs(cls, inputs, traffic_data, energy_data, **kwargs):
+        """Build from the outputs of read_all_inputs and compute_traffic_and_energy."""
+        return cls(inputs['years'], inputs['phpdt'], traffic_data['capacity'],
+                   inputs['params'], traffic_data['train_weight'], inputs['power'],
+                   energy_data['aux_eff'], **kwargs)
+
+    def sample(self, size, rng):
+        """PHPDT samples, shape (size, years)."""
+        normal = rng.standard_normal((size, len(self.years)))
+        return self.phpdt * np.exp(normal @ self.cholesky.T)
+
+    def evaluate(self, phpdt):
+        """Headway, trains and max demand for PHPDT samples of shape (n, years)."""
+        params, power = self.params, self.power
+        headway = headway_array(phpdt, self.train_capacity)
+        trains = trains_array(headway, params['section_length'],
+                              params['average_speed'], params['reversal_time'])
+        if self.fleet is not None:
+            traction = effective_demand_array(self.fleet.demand_array(headway), power['DepotTP'],
+                                              power['TrLoss'], power['TrPF'])
+        else:
+            _, traction = traction_energy_array(
+                headway, params['section_length'], self.train_weight, power['SEC'],
+                power['Regen'], power['DepotTP'], power['TrLoss'], power['TrPF'])
+        return {
+            'headway': headway,
+            'trains': trains,
+            'max_demand': max_demand_array(traction, self.aux_mw),
+        }
+
+    def run(self, samples=100000, seed=0, shard_size=25000, workers=None):
+        """
+        Evaluate `samples` forecasts in shards of `shard_size`. Every shard
+        draws from its own stream spawned from `seed`, so results depend only
+        on (samples, seed, shard_size), not on how shards are scheduled.
+        With workers > 1 the shards run in a process pool.
+        """
+        sizes = [min(shard_size, samples - start) for start in range(0, samples, shard_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        if workers and workers > 1 and len(sizes) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                shards = list(pool.map(_run_shard, [self] * len(sizes), seeds, sizes))
+        else:
+            shards = [_run_shard(self, s, n) for s, n in zip(seeds, sizes)]
+
+        return {key: np.concatenate([shard[key] for shard in shards]) for key in shards[0]}
+
+    def percentiles(self, results, levels=(50, 90, 95)):
+        """
+        Year-wise percentiles of the fleet size and max demand, e.g.
+        {'2030': {'trains': {'P50': .., 'P90': .., 'P95': ..}, 'max_demand': {...}}}.
+        Percentiles are taken as sample values, so fleet sizes stay whole trains.
+        """
+        summary = {}
+        for i, year in enumerate(self.years):
+            summary[year] = {
+                key: {f'P{p}': float(np.nanpercentile(results[key][:, i], p, method='higher'))
+                      for p in levels}
+                for key in ('trains', 'max_demand')
+            }
+        return summary
@@ -1,14 +1,66 @@
 import math
 
+import numpy as np
+
+from dpr.dpr_train import py_round, year_array
+
+
+def traction_energy_array(headway, section_length, train_weight, sec, regen,
+                          depot_tp, tr_loss, tr_pf):
+    """
+    Traction energy (MW) for broadcastable arrays of headway (min), section
+    length (km), AW4 train weight (t) and traction power parameters (SEC in
+    kWh per 1000 GTKM, regeneration and losses in %). Returns the raw and
+    the effective (regeneration, depot, losses and PF) values.
+    """
+    # kWh per trip
+    energy_per_trip = np.asarray(sec, dtype=float) * train_weight * section_length / 1e6
+    with np.errstate(divide='ignore', invalid='ignore'):
+        train_nos = 60 * 2 / np.asarray(headway, dtype=float)
+    energy_raw = py_round(energy_per_trip * train_nos, 2)
+    energy_with_depot = energy_raw * (1 - np.asarray(regen) / 100) + depot_tp
+    energy_eff = py_round(energy_with_depot / (1 - np.asarray(tr_loss) / 100) / tr_pf, 2)
+    return energy_raw, energy_eff
+
+
+def total_energy_array(traction_mw, auxiliary_mw, hours, days, diversity_factor):
+    """
+    Yearly energy units (MWh) for broadcastable arrays of traction and
+    auxiliary power (MW) and working hours/days.
+    """
+    tr_units = np.asarray(traction_mw, dtype=float) * hours * days / 1000
+    aux_units = np.asarray(auxiliary_mw, dtype=float) * hours * days * diversity_factor / 1000
+    return py_round(tr_units + aux_units, 2)
+
+
+def max_demand_array(traction_mw, auxiliary_mw):
+    """Max demand (MW, rounded up) for arrays of traction and auxiliary power (MW)."""
+    return np.ceil(np.asarray(traction_mw, dtype=float) + auxiliary_mw)
+
+
+def effective_demand_array(traction_mw, depot_tp, tr_loss, tr_pf):
+    """
+    Traction demand at the supply (MW) for arrays of measured traction
+    demand (MW), with the depot load, losses (%) and power factor.
+    """
+    return (np.asarray(traction_mw, dtype=float) + depot_tp) / (1 - tr_loss / 100) / tr_pf
+
+
 class EnergyRequirement:
     def __init__(self, power_params, working_hours, yearly_headways,
-                    section_length, train_weight_aw4,years):
+                    section_length, train_weight_aw4,years, fleet_demand=None,
+                    service_plan=None):
         """
         power_params: dict containing keys like 'SEC', 'Regen', 'DepotTP', 'TrLoss', 'TrPF',
                      'ElStnPwr', 'ElStnNos', 'UGStnPwr', 'UGStnNos', 'DpPwr', 'DpNos',
                      'AuxLoss', 'AuxPF'
         working_hours: dict with keys 'Hours' and 'Days'
         diversity_factor: float (e.g. 0.85 for 85%)
+        fleet_demand: optional dict year -> measured fleet traction max demand (MW),
+                      see FleetPowerTimeline; replaces the estimated max demand
+        service_plan: optional hour bands [(start, end, headway factor)], see
+                      dpr_service; yearly units then follow the hourly service
+                      instead of peak service for 'Hours' hours
         """
         self.power = power_params
         self.working_hours = working_hours
@@ -17,23 +69,21 @@ class EnergyRequirement:
         self.section_length = section_length
         self.train_weight_aw4 = train_weight_aw4
         self.years = years
+        self.fleet_demand = fleet_demand or {}
+        self.service_plan = service_plan
 
     def compute_traction_energy(self, yearly_headways, section_length, train_weight_aw4):
         energy_raw = {}
         energy_regen_eff = {}
 
-        # kWh per trip
-        energy_per_trip = self.power['SEC'] * train_weight_aw4 * section_length / 1e6
-
-        for year, headway in yearly_headways.items():
-            train_nos = 60 * 2 / headway
-            energy_raw[year] = round(energy_per_trip * train_nos, 2)
-
-        for year, val in energy_raw.items():
-            energy_wo_regen = val
-            energy_with_depot = energy_wo_regen * (1 - self.power['Regen']/100) + self.power['DepotTP']
-            final_energy = energy_with_depot / (1 - self.power['TrLoss']/100) / self.power['TrPF']
-            energy_regen_eff[year] = round(final_energy, 2)
+        years = list(yearly_headways)
+        raw, eff = traction_energy_array(
+            year_array(yearly_headways, years), section_length, train_weight_aw4,
+            self.power['SEC'], self.power['Regen'], self.power['DepotTP'],
+            self.power['TrLoss'], self.power['TrPF'])
+        for year, r, e in zip(years, raw.tolist(), eff.tolist()):
+            energy_raw[year] = None if math.isnan(r) else r
+            energy_regen_eff[year] = None if math.isnan(e) else e
 
         return [energy_raw, energy_regen_eff]
 
@@ -54,26 +104,44 @@ class EnergyRequirement:
 
         return [energy_raw, energy_regen_eff]
 
+    def effective_traction_demand(self, traction_mw):
+        """Measured traction demand at the supply, with depot load, losses and PF."""
+        return float(effective_demand_array(traction_mw, self.power['DepotTP'],
+                                            self.power['TrLoss'], self.power['TrPF']))
+
+    def compute_hourly_demand(self, auxiliary_mw, years):
+        """Hour x year service and power of the service plan, see hourly_demand()."""
+        # dpr_service builds on the array functions above
+        from dpr.dpr_service import hourly_demand
+        return hourly_demand(self.service_plan, year_array(self.yearly_headways, years),
+                             self.section_length, self.train_weight_aw4, self.power,
+                             year_array(auxiliary_mw, years), self.working_hours['Days'])
+
     def compute_total_energy(self, traction_mw, auxiliary_mw, years):
         total_units = {}
         max_demand = {}
 
-        for year in years:
-            total_power = traction_mw[year] + auxiliary_mw[year]
-            max_demand[year] = math.ceil(total_power)
-            tr_units = (traction_mw[year]
-                        * self.working_hours['Hours']
-                        * self.working_hours['Days']
-                        / 1000
-                        )
-            aux_units = (auxiliary_mw[year]
-                        * self.working_hours['Hours']
-                        * self.working_hours['Days']
-                        * self.diversity_factor
-                        / 1000
-                        )
-
-            total_units[year] = round(tr_units + aux_units, 2)
+        traction = np.array([traction_mw[year] for year in years], dtype=float)
+        auxiliary = np.array([auxiliary_mw[year] for year in years], dtype=float)
+        if self.service_plan:
+            hourly = self.compute_hourly_demand(auxiliary_mw, years)
+            units = hourly['annual_units']
+            traction = hourly['traction_mw'].max(axis=0)
+        else:
+            units = total_energy_array(traction, auxiliary, self.working_hours['Hours'],
+                                       self.working_hours['Days'], self.diversity_factor)
+
+        # Max demand from the measured fleet demand where there is one
+        demand_mw = traction.copy()
+        for i, year in enumerate(years):
+            if self.fleet_demand.get(year) is not None:
+                demand_mw[i] = self.effective_traction_demand(self.fleet_demand[year])
+        demand = max_demand_array(demand_mw, auxiliary)
+
+        # Years without service (e.g. zero PHPDT) have no energy or demand
+        for year, u, d in zip(years, units.tolist(), demand.tolist()):
+            total_units[year] = u if math.isfinite(u) else None
+            max_demand[year] = int(d) if math.isfinite(d) else None
 
         return [total_units, max_demand]
 
@@ -28,6 +28,12 @@ from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 
+
+def _cell(value, digits):
+    """Table cell text for a rounded value; '-' for years without a value."""
+    return '-' if value is None else str(round(value, digits))
+
+
 class MetroReportGenerator:
     def __init__(self,
                 corridor: str, parameters: dict[str, str|float|int], train_composition: str,
@@ -138,7 +144,7 @@ class MetroReportGenerator:
         traffic_data = [
             [str(self.data['DailyRidership'][yr]) for yr in self.years],
             [str(self.data['PHPDT'][yr]) for yr in self.years],
-            [str(round(self.yearly_headways[yr], 1)) for yr in self.years],
+            [_cell(self.yearly_headways[yr], 1) for yr in self.years],
             [str(self.yearly_trains[yr]) for yr in self.years]
         ]
         self.create_formatted_table(self.years, self.tfc_labels, traffic_data)
@@ -163,12 +169,12 @@ class MetroReportGenerator:
         self.add_formatted_para("Auxiliary Power Factor: \t", self.apower['AuxPF'])
 
         energy_data = [
-            [str(round(self.trc_energy[0][yr], 2)) for yr in self.years],
-            [str(round(self.trc_energy[1][yr], 2)) for yr in self.years],
-            [str(round(self.aux_energy[0][yr], 2)) for yr in self.years],
-            [str(round(self.aux_energy[1][yr], 2)) for yr in self.years],
-            [str(round(self.total_energy[0][yr], 2)) for yr in self.years],
-            [str(round(self.total_energy[1][yr], 2)) for yr in self.years]
+            [_cell(self.trc_energy[0][yr], 2) for yr in self.years],
+            [_cell(self.trc_energy[1][yr], 2) for yr in self.years],
+            [_cell(self.aux_energy[0][yr], 2) for yr in self.years],
+            [_cell(self.aux_energy[1][yr], 2) for yr in self.years],
+            [_cell(self.total_energy[0][yr], 2) for yr in self.years],
+            [_cell(self.total_energy[1][yr], 2) for yr in self.years]
         ]
         self.create_formatted_table(self.years, self.pw_labels, energy_data)
 
@@ -0,0 +1,59 @@
+import numpy as np
+
+from dpr.dpr_power import max_demand_array, traction_energy_array
+from dpr.dpr_train import py_round
+
+HOURS = 24
+
+
+def hourly_factors(bands):
+    """
+    Headway factor (x peak headway) for each hour of the day, NaN for hours
+    without service. A band ending before it starts runs past midnight.
+    """
+    factors = np.full(HOURS, np.nan)
+    for start, end, factor in bands:
+        if not (0 <= start < HOURS and 0 < end <= HOURS and start != end):
+            raise ValueError(f"Invalid service plan hours {start}-{end}")
+        if factor <= 0:
+            raise ValueError(f"Service plan headway factor must be positive, got {factor}")
+        hours = np.arange(start, end) if start < end else np.r_[start:HOURS, 0:end]
+        if not np.isnan(factors[hours]).all():
+            raise ValueError(f"Service plan band {start}-{end} overlaps another band")
+        factors[hours] = factor
+    return factors
+
+
+def hourly_demand(bands, headway, section_length, train_weight, power, aux_mw, days):
+    """
+    Hour x year service and power for a service plan, given the peak
+    headway (min) and effective auxiliary power (MW) per year as arrays.
+    Returns arrays of shape (24, years) for 'headway', 'trains_per_hour'
+    (both directions), 'traction_mw', 'aux_mw' and 'demand_mw', and per
+    year 'annual_units' (MWh, auxiliary with the diversity factor) and
+    'max_demand' (MW of the busiest hour, rounded up).
+    """
+    factors = hourly_factors(bands)[:, None]
+    service = ~np.isnan(factors)
+    headway = np.asarray(headway, dtype=float)[None, :] * factors
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trains = np.where(service & (headway > 0), 60 * 2 / headway, 0.0)
+    _, traction = traction_energy_array(
+        headway, section_length, train_weight, power['SEC'], power['Regen'],
+        power['DepotTP'], power['TrLoss'], power['TrPF'])
+    traction = np.where(service, np.nan_to_num(traction), 0.0)
+    aux = np.where(service, np.asarray(aux_mw, dtype=float)[None, :], 0.0)
+    demand = traction + aux
+
+    # Each hour of the day contributes its MW for one hour
+    units = (traction.sum(axis=0) + aux.sum(axis=0) * power['DF']) * days / 1000
+    return {
+        'headway': np.where(service, headway, np.nan),
+        'trains_per_hour': trains,
+        'traction_mw': traction,
+        'aux_mw': aux,
+        'demand_mw': demand,
+        'annual_units': py_round(units, 2),
+        'max_demand': max_demand_array(demand.max(axis=0), 0.0),
+    }
@@ -1,5 +1,61 @@
 import math
 
+import numpy as np
+
+
+def py_round(values, ndigits):
+    """
+    Element-wise round() for arrays, giving exactly what Python's round()
+    gives on each float. np.round differs on values close to a decimal
+    tie (e.g. 27.405), so those few are rounded by Python.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.atleast_1d(np.round(values, ndigits))
+    flat = np.atleast_1d(values)
+    scaled = flat * 10.0**ndigits
+    with np.errstate(invalid='ignore'):
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(v, ndigits) for v in flat[near_tie].tolist()]
+    return rounded.reshape(values.shape)
+
+
+def headway_array(phpdt, train_capacity):
+    """
+    Headway (min) for arrays of PHPDT and train capacity, e.g. shaped
+    (scenarios, years); NaN where the PHPDT is not positive.
+    """
+    phpdt = np.asarray(phpdt, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        headway = py_round(60 * np.asarray(train_capacity, dtype=float) / phpdt, 2)
+    return np.where(phpdt > 0, headway, np.nan)
+
+
+def trains_array(headway, section_length, avg_speed, reversal_time):
+    """
+    Trains needed to run a headway (min) over a round trip of the section,
+    for broadcastable arrays; NaN where the headway is missing or not positive.
+    """
+    headway = np.asarray(headway, dtype=float)
+    avg_speed = np.asarray(avg_speed, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        travel_time = np.where(avg_speed > 0, section_length / avg_speed * 60, np.inf)
+        cycle_time = 2 * (travel_time + reversal_time)
+        trains = np.ceil(cycle_time / headway)
+    return np.where(headway > 0, trains, np.nan)
+
+
+def year_array(values, years):
+    """Year-keyed dict values as a float array, NaN where missing or not numeric."""
+    out = np.full(len(years), np.nan)
+    for i, year in enumerate(years):
+        try:
+            out[i] = float(values.get(year))
+        except (ValueError, TypeError):
+            pass
+    return out
+
+
 class TrainsRequirement:
     def __init__(self, capacity_info, phpdt_dict, params, tare_dict, train_composition):
         """
@@ -43,29 +99,17 @@ class TrainsRequirement:
         return total_capacity
 
     def compute_headways(self, train_capacity):
-        headways = {}
-        for year, phpdt in self.phpdt_dict.items():
-            try:
-                phpdt_val = float(phpdt)
-                headway = round(60 * train_capacity / phpdt_val, 2) if phpdt_val > 0 else None
-            except (ValueError, TypeError):
-                headway = None
-            headways[year] = headway
-        return headways
+        years = list(self.phpdt_dict)
+        headways = headway_array(year_array(self.phpdt_dict, years), train_capacity)
+        return {year: None if math.isnan(h) else h
+                for year, h in zip(years, headways.tolist())}
 
     def compute_train_requirements(self, headways_dict):
-        trains = {}
-
-        travel_time = (self.section_length / self.avg_speed) * 60 if self.avg_speed > 0 else float('inf')
-        cycle_time = 2 * (travel_time + self.reversal_time)
-
-        for year, headway in headways_dict.items():
-            if headway and headway > 0:
-                trains[year] = math.ceil(cycle_time / headway)
-            else:
-                trains[year] = None
-
-        return trains
+        years = list(headways_dict)
+        trains = trains_array(year_array(headways_dict, years), self.section_length,
+                              self.avg_speed, self.reversal_time)
+        return {year: None if math.isnan(n) else int(n)
+                for year, n in zip(years, trains.tolist())}
 
     def compute_aw4_weights(self, aw4_capacity):
         num_cars = len(self.train_composition)
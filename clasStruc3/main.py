@@ -2,12 +2,24 @@
 # Purpose: Entry script to initialize and run the train simulation and report pipeline.
 
 import os
+import sys
+import argparse
+import json
 import logging
-import pandas as pd
+from contextlib import redirect_stdout
+from functools import partial
 
+from dpr.dpr_composition import CompositionOptimiser
+from dpr.dpr_forecast import AnnualForecast
+from dpr.dpr_montecarlo import RidershipMonteCarlo
+from simulation.batch import discover_corridors, run_network
+from simulation.pipeline import Pipeline
 from simulation.setup import prepare_directories, load_paths, read_all_inputs
-from simulation.analysis import compute_traffic_and_energy, run_simulation
-from simulation.reporting import generate_report_and_outputs
+from simulation.analysis import (build_fleet, compute_traffic_and_energy, compute_fleet_demand,
+                                 compute_summary, run_simulation)
+from simulation.incremental import BuildManifest
+from simulation.sec import derive_sec
+from simulation.reporting import generate_dpr_report, output_files, write_speed_outputs
 
 # Configure logging
 logging.basicConfig(
@@ -17,31 +29,208 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def main():
-    try:
-        # Step 1: Setup
+# Parsed inputs, keyed by the content hash of the input files
+INPUT_CACHE_DIR = os.path.join(os.getcwd(), 'cache', 'inputs')
+# Simulator-derived SEC, keyed by train parameters and alignment
+SEC_CACHE_DIR = os.path.join(os.getcwd(), 'cache', 'sec')
+# Simulated station-to-station segments, keyed by train parameters and alignment
+SEGMENT_CACHE_DIR = os.path.join(os.getcwd(), 'cache', 'segments')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Metro DPR and train run simulation")
+    parser.add_argument('--batch', metavar='DIR',
+                        help="run every corridor file (*.csv) in DIR, e.g. ../csv")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for --batch (default: one per CPU) "
+                             "and --monte-carlo (default: in process)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every output even when its inputs are unchanged")
+    parser.add_argument('--compute-only', action='store_true',
+                        help="run the DPR calculations and the simulation only and "
+                             "print a JSON summary (no plots or reports)")
+    parser.add_argument('--simulated-sec', action='store_true',
+                        help="derive SEC from the simulated run (AW4 load) instead of "
+                             "the TrPower input for the DPR energy tables")
+    parser.add_argument('--monte-carlo', type=int, metavar='N',
+                        help="sample N PHPDT forecasts and print P50/P90/P95 fleet "
+                             "size and max demand (of the simulated fleet, as in "
+                             "the DPR report) per year as JSON")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="random seed for --monte-carlo")
+    parser.add_argument('--annual', choices=('linear', 'cagr'),
+                        help="interpolate the forecast to every year, write the "
+                             "year-wise DPR table to output/dpr/annual_forecast.csv and "
+                             "print the rake procurement steps as JSON")
+    parser.add_argument('--compositions', action='store_true',
+                        help="compare 3/4/6/8-car compositions whose motor cars can "
+                             "reach the design acceleration and print the Pareto "
+                             "front of fleet cars, traction energy and headway "
+                             "feasibility as JSON")
+    parser.add_argument('--min-headway', type=float, default=2.0,
+                        help="shortest feasible headway (min) for --compositions")
+    return parser.parse_args()
+
+def run_batch(corridor_dir, workers, force=False):
+    input_dirs, _ = prepare_directories()
+    corridor_files = discover_corridors(corridor_dir)
+    if not corridor_files:
+        print(f"No corridor files found in {corridor_dir}")
+        return
+    output_root = os.path.join(os.getcwd(), 'output', 'network')
+    summary = run_network(corridor_files, input_dirs['speed'], output_root, workers,
+                          cache_dir=INPUT_CACHE_DIR, incremental=not force,
+                          segment_cache_dir=SEGMENT_CACHE_DIR)
+    print(summary[['File', 'Status', 'Reused', 'Speed Inputs']].to_string(index=False))
+
+def run_compute_only(simulated_sec=False):
+    # Progress messages go to stderr so stdout holds only the JSON summary
+    with redirect_stdout(sys.stderr):
         input_dirs, output_dirs = prepare_directories()
         paths = load_paths(input_dirs, output_dirs)
+        inputs = read_all_inputs(paths, INPUT_CACHE_DIR)
+        sec = derive_sec(inputs, cache_dir=SEC_CACHE_DIR) if simulated_sec else None
+        traffic_data, energy_data = compute_traffic_and_energy(
+            inputs, sec['AW4']['sec'] if sec else None)
+        result, total_mass = run_simulation(inputs, cache_dir=SEGMENT_CACHE_DIR)
+        reverse, _ = run_simulation(inputs, cache_dir=SEGMENT_CACHE_DIR, reverse=True)
+        energy_data = compute_fleet_demand(inputs, traffic_data, energy_data, result, reverse)
+        summary = compute_summary(inputs, traffic_data, energy_data, result, total_mass, sec)
+    print(json.dumps(summary, indent=2, default=float))
 
-        # Step 2: Read input data
-        inputs = read_all_inputs(paths)
+def run_monte_carlo(samples, seed, workers):
+    with redirect_stdout(sys.stderr):
+        input_dirs, output_dirs = prepare_directories()
+        paths = load_paths(input_dirs, output_dirs)
+        inputs = read_all_inputs(paths, INPUT_CACHE_DIR)
+        traffic_data, energy_data = compute_traffic_and_energy(inputs)
+        # Max demand from the simulated fleet, as in the DPR report
+        result, _ = run_simulation(inputs, cache_dir=SEGMENT_CACHE_DIR)
+        reverse, _ = run_simulation(inputs, cache_dir=SEGMENT_CACHE_DIR, reverse=True)
+        fleet = build_fleet(inputs, result, reverse)
+        model = RidershipMonteCarlo.from_inputs(inputs, traffic_data, energy_data, fleet=fleet)
+        results = model.run(samples, seed=seed, workers=workers)
+    print(json.dumps(model.percentiles(results), indent=2))
 
-        # Step 3: Perform calculations
+def run_annual(method):
+    with redirect_stdout(sys.stderr):
+        input_dirs, output_dirs = prepare_directories()
+        paths = load_paths(input_dirs, output_dirs)
+        inputs = read_all_inputs(paths, INPUT_CACHE_DIR)
         traffic_data, energy_data = compute_traffic_and_energy(inputs)
+        result, _ = run_simulation(inputs, cache_dir=SEGMENT_CACHE_DIR)
+        reverse, _ = run_simulation(inputs, cache_dir=SEGMENT_CACHE_DIR, reverse=True)
+        fleet = build_fleet(inputs, result, reverse)
+        forecast = AnnualForecast.from_inputs(inputs, traffic_data, energy_data,
+                                              method=method, fleet=fleet)
+        table = forecast.compute()
+        csv_path = os.path.join(output_dirs['dpr'], 'annual_forecast.csv')
+        forecast.write_csv(csv_path, table)
+        print(f"Year-wise DPR table written to {csv_path}")
+    print(json.dumps(forecast.procurement(table), indent=2))
 
-        # Step 4: Run physical simulation
-        log_df, total_mass = run_simulation(inputs)
+def run_compositions(min_headway):
+    with redirect_stdout(sys.stderr):
+        input_dirs, output_dirs = prepare_directories()
+        paths = load_paths(input_dirs, output_dirs)
+        inputs = read_all_inputs(paths, INPUT_CACHE_DIR)
+        optimiser = CompositionOptimiser.from_inputs(inputs, min_headway=min_headway)
+        front = optimiser.optimise()
+    print(json.dumps(front, indent=2))
+
+def build_pipeline(paths, output_dirs, manifest=None, simulated_sec=False):
+    """
+    Stages of one corridor run and their dependencies. With a manifest,
+    reports whose inputs are unchanged are not written again. With
+    simulated_sec, the DPR energy tables use the SEC of the simulated run.
+    """
+    pipeline = Pipeline(manifest=manifest)
+    outputs = output_files(paths, output_dirs)
+    # Step 2: Read input data
+    pipeline.add('inputs', partial(read_all_inputs, paths, INPUT_CACHE_DIR))
+    # Step 3: Perform calculations
+    if simulated_sec:
+        pipeline.add('sec', partial(derive_sec, cache_dir=SEC_CACHE_DIR),
+                     deps=['inputs'], kind='process')
+        pipeline.add('traffic_energy',
+                     lambda inputs, sec: compute_traffic_and_energy(inputs, sec['AW4']['sec']),
+                     deps=['inputs', 'sec'])
+    else:
+        pipeline.add('traffic_energy', compute_traffic_and_energy, deps=['inputs'])
+    # Step 4: Run physical simulation
+    pipeline.add('simulation', partial(run_simulation, cache_dir=SEGMENT_CACHE_DIR),
+                 deps=['inputs'], kind='process')
+    pipeline.add('return_run',
+                 partial(run_simulation, cache_dir=SEGMENT_CACHE_DIR, reverse=True),
+                 deps=['inputs'], kind='process')
+    # Step 5: Whole-day fleet power demand from the simulated trips
+    pipeline.add('fleet_demand',
+                 lambda inputs, dpr, run, back: compute_fleet_demand(inputs, *dpr, run[0], back[0]),
+                 deps=['inputs', 'traffic_energy', 'simulation', 'return_run'])
+    # Step 6: Generate report and outputs
+    pipeline.add('dpr_report',
+                 lambda inputs, dpr, energy_data: generate_dpr_report(
+                     paths, inputs, dpr[0], energy_data, output_dirs),
+                 deps=['inputs', 'traffic_energy', 'fleet_demand'],
+                 outputs=outputs['dpr_report'])
+    pipeline.add('speed_outputs', lambda run: write_speed_outputs(run[0], output_dirs),
+                 deps=['simulation'], outputs=outputs['speed_outputs'])
+    return pipeline
 
-        run_dist = log_df['Total Distance (km)'].iloc[0]
-        run_time = log_df['Total Time (min)'].iloc[0]
-        run_speed = log_df['Average Speed (km/h)'].iloc[0]
+def main():
+    args = parse_args()
+    if args.batch:
+        run_batch(args.batch, args.workers, args.force)
+        return
+    if args.compute_only:
+        run_compute_only(args.simulated_sec)
+        return
+    if args.monte_carlo:
+        run_monte_carlo(args.monte_carlo, args.seed, args.workers)
+        return
+    if args.annual:
+        run_annual(args.annual)
+        return
+    if args.compositions:
+        run_compositions(args.min_headway)
+        return
+
+    try:
+        # Step 1: Setup
+        input_dirs, output_dirs = prepare_directories()
+        paths = load_paths(input_dirs, output_dirs)
+
+        # Steps 2-6 as a stage graph: the DPR calculations run alongside the
+        # simulation, and the DPR report alongside the speed outputs
+        manifest = BuildManifest(os.path.join(os.getcwd(), 'output', 'manifest.json'))
+        if args.force:
+            manifest.entries = {}
+        pipeline = build_pipeline(paths, output_dirs, manifest, args.simulated_sec)
+        results = pipeline.run()
+        manifest.save()
+        result, total_mass = results['simulation']
+        energy_data = results['fleet_demand']
+        for load_case, sec in results.get('sec', {}).items():
+            logging.info(f"Simulated SEC ({load_case}): {sec['sec']} kWh/1000 GTKM")
 
         logging.info(f"Train_wt: {total_mass} tons")
-        logging.info(f"Average speed for the trip was: {run_speed:.2f} km/hr")
-        logging.info(f"A total distance of {run_dist:.2f} Km was covered in {run_time:.2f} minutes.")
+        logging.info(f"Average speed for the trip was: {result.average_speed:.2f} km/hr")
+        logging.info(f"A total distance of {result.total_distance:.2f} Km was covered in {result.total_time:.2f} minutes.")
+
+        for year, demand in energy_data['fleet_demand'].items():
+            if demand is not None:
+                logging.info(f"{year}: fleet traction peak {demand['peak']} MW, "
+                             f"15-min max demand {demand['max_demand']} MW")
+        for year, sharing in energy_data['regen_sharing'].items():
+            if sharing is not None:
+                logging.info(f"{year}: regeneration {sharing['regen']} MWh/day, "
+                             f"receptivity {sharing['receptivity']}, "
+                             f"net traction {sharing['net']} MWh/day")
 
-        # Step 5: Generate report and outputs
-        generate_report_and_outputs(paths, inputs, traffic_data, energy_data, log_df, output_dirs)
+        for stage, seconds in pipeline.timings.items():
+            logging.info(f"Stage {stage}: {seconds:.3f} s")
+        logging.info(f"Pipeline wall time: {pipeline.elapsed:.3f} s")
+        if pipeline.reused:
+            print(f"Unchanged, outputs reused: {', '.join(pipeline.reused)}")
 
         print("\nSimulation complete. Output files generated.")
 
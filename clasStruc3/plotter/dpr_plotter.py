@@ -1,4 +1,4 @@
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 class TransitPlotGenerator:
     """
@@ -41,17 +41,18 @@ class TransitPlotGenerator:
         headway_norm, h_factor = self._normalize(headway_vals)
         train_norm, t_factor = self._normalize(train_vals)
 
-        plt.figure(figsize=(10, 6))
-        plt.plot(self.years, ridership_norm, marker='o', label=f"Ridership (×{r_factor:.2f})")
-        plt.plot(self.years, phpdt_norm, marker='s', label=f"PHPDT (×{p_factor:.2f})")
-        plt.plot(self.years, headway_norm, marker='^', label=f"Headway (×{h_factor:.2f})")
-        plt.plot(self.years, train_norm, marker='d', label=f"Train Number (×{t_factor:.2f})")
-
-        plt.xlabel("Year")
-        plt.ylabel("Normalized Value")
-        plt.title("Normalized Transit Data Over Years")
-        plt.legend()
-        plt.grid(True)
-        plt.tight_layout()
-        plt.savefig(self.image_filename)
-        plt.close()
+        # Figure API (no pyplot state), so plots can be drawn from any thread
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        ax.plot(self.years, ridership_norm, marker='o', label=f"Ridership (×{r_factor:.2f})")
+        ax.plot(self.years, phpdt_norm, marker='s', label=f"PHPDT (×{p_factor:.2f})")
+        ax.plot(self.years, headway_norm, marker='^', label=f"Headway (×{h_factor:.2f})")
+        ax.plot(self.years, train_norm, marker='d', label=f"Train Number (×{t_factor:.2f})")
+
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Normalized Value")
+        ax.set_title("Normalized Transit Data Over Years")
+        ax.legend()
+        ax.grid(True)
+        fig.tight_layout()
+        fig.savefig(self.image_filename)
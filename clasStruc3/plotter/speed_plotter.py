@@ -1,33 +1,34 @@
 ## plotter.py
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 class Plotter:
     """
     Plots and saves the speed-time profile (and optional energy) from simulation logs.
+    Uses the Figure API rather than pyplot, so it is safe to call from any thread.
     """
     def __init__(self, figsize=(10, 6)):
         self.figsize = figsize
 
     def plot(self, df, speed_path, energy_path=None):
-        plt.figure(figsize=self.figsize)
-        plt.plot(df['Time (s)'], df['Speed (m/s)'], label='Speed (m/s)')
-        plt.xlabel('Time (s)')
-        plt.ylabel('Speed (m/s)')
-        plt.title('Speed Profile')
-        plt.grid(True)
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(speed_path)
-        plt.close()
+        fig = Figure(figsize=self.figsize)
+        ax = fig.add_subplot()
+        ax.plot(df['Time (s)'], df['Speed (m/s)'], label='Speed (m/s)')
+        ax.set_xlabel('Time (s)')
+        ax.set_ylabel('Speed (m/s)')
+        ax.set_title('Speed Profile')
+        ax.grid(True)
+        ax.legend()
+        fig.tight_layout()
+        fig.savefig(speed_path)
 
         if energy_path:
-            plt.figure(figsize=self.figsize)
-            plt.plot(df['Time (s)'], df['Energy (kJ)'], label='Energy (J)')
-            plt.xlabel('Time (s)')
-            plt.ylabel('Energy (J)')
-            plt.title('Energy Consumption')
-            plt.grid(True)
-            plt.legend()
-            plt.tight_layout()
-            plt.savefig(energy_path)
-            plt.close()
+            fig = Figure(figsize=self.figsize)
+            ax = fig.add_subplot()
+            ax.plot(df['Time (s)'], df['Energy (kJ)'], label='Energy (J)')
+            ax.set_xlabel('Time (s)')
+            ax.set_ylabel('Energy (J)')
+            ax.set_title('Energy Consumption')
+            ax.grid(True)
+            ax.legend()
+            fig.tight_layout()
+            fig.savefig(energy_path)
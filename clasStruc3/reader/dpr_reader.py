@@ -1,166 +1,235 @@
 import csv
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+
+class CorridorConfig(NamedTuple):
+    """Read-only configuration and forecast of one corridor block."""
+    corridor: str
+    years: tuple
+    daily_ridership: MappingProxyType
+    phpdt: MappingProxyType
+    train_info: MappingProxyType
+    train_comp: tuple
+    params: MappingProxyType
+    tare: MappingProxyType
+    power: MappingProxyType
+    working: MappingProxyType
+    service_plan: Optional[tuple] = None
+
+    def to_dict(self):
+        """Plain dicts and lists, as used by read_all_inputs()."""
+        return {name: _plain(value) for name, value in self._asdict().items()}
+
+
+def _plain(value):
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _cells(row):
+    return [cell.strip() for cell in row]
+
+
+def _text(row):
+    if not row or not row[0].strip():
+        raise ValueError("expected a name")
+    return row[0].strip()
+
+
+def _years(row):
+    years = tuple(cell for cell in _cells(row) if cell)
+    for year in years:
+        int(year)
+    if not years:
+        raise ValueError("expected at least one year")
+    return years
+
+
+def _series(row):
+    """Year-wise values, matched to the block's Year row when the block is complete."""
+    return tuple(float(cell) for cell in _cells(row) if cell)
+
+
+def _capacity(name):
+    # Seating capacity, AW3 standing, AW4 standing; missing values are 0
+    def convert(row):
+        values = [int(cell) for cell in _cells(row)[:3] if cell]
+        values += [0] * (3 - len(values))
+        return {name: MappingProxyType(dict(zip(("seat", "AW3", "AW4"), values)))}
+    return convert
+
+
+def _composition(row):
+    # One comma-separated cell, or one coach per cell
+    comp = tuple(coach.strip() for cell in row for coach in cell.split(',') if coach.strip())
+    if not comp:
+        raise ValueError("expected at least one coach")
+    return comp
+
+
+def _fixed(names, kind=float):
+    """Exactly the first len(names) cells as named values."""
+    def convert(row):
+        values = _cells(row)[:len(names)]
+        if len(values) < len(names) or not all(values):
+            raise ValueError(f"expected {len(names)} values: {', '.join(names)}")
+        return dict(zip(names, map(kind, values)))
+    return convert
+
+
+def _tare(row):
+    tare = _fixed(("DMC", "TC", "PassWt"))(row)
+    tare["MC"] = tare["DMC"]  # assuming DMC and MC are same weight
+    return tare
+
+
+def parse_bands(cells):
+    """
+    Hour bands of a ServicePlan row, e.g. ['6-8:1.5', '8-11:1', '20-24:2']
+    -> [(6, 8, 1.5), (8, 11, 1.0), (20, 24, 2.0)]. Each band runs from its
+    start hour up to its end hour at the peak headway times its factor.
+    """
+    bands = []
+    for cell in cells:
+        cell = cell.strip()
+        if not cell:
+            continue
+        try:
+            hours, factor = cell.split(':')
+            start, end = hours.split('-')
+            bands.append((int(start), int(end), float(factor)))
+        except ValueError:
+            raise ValueError(f"Invalid service plan band '{cell}', expected start-end:factor")
+    return bands
+
+
+def _service_plan(row):
+    return tuple(parse_bands(row))
+
+
+# Row label -> (record field, converter of the cells after the label); labels
+# match case-insensitively. Rows whose converters return dicts and share a
+# field are merged.
+FIELDS = {
+    "Corridor": ("corridor", _text),
+    "Year": ("years", _years),
+    "DailyRidership": ("daily_ridership", _series),
+    "PHPDT": ("phpdt", _series),
+    "Dmc": ("train_info", _capacity("Dmc")),
+    "Tc": ("train_info", _capacity("Tc")),
+    "TrainComp": ("train_comp", _composition),
+    "Parameters": ("params", _fixed(("average_speed", "section_length", "reversal_time"))),
+    "TareWeight": ("tare", _tare),
+    "TrPower": ("power", _fixed(("SEC", "Regen", "TrLoss", "TrPF", "DepotTP"))),
+    "AuxPower": ("power", _fixed(("ElStnPwr", "ElStnNos", "UGStnPwr", "UGStnNos",
+                                  "DpPwr", "DpNos", "AuxLoss", "AuxPF", "DF"))),
+    "Working": ("working", _fixed(("Hours", "Days"), int)),
+    "ServicePlan": ("service_plan", _service_plan),
+}
+LABELS = {label.lower(): label for label in FIELDS}
+OPTIONAL = {"ServicePlan"}
+YEAR_SERIES = ("daily_ridership", "phpdt")
+
 
 class ConfigReader:
     """
     Reads corridor configuration and forecasting data from a structured CSV.
 
-    The CSV must include rows for:
+    Each corridor block starts at a Corridor row and must include rows for:
       Corridor, Year, DailyRidership, PHPDT,
       Dmc, Tc,
       TrainComp, Parameters, TareWeight,
-      TrPower, AuxPower, Working.
-
-    After `reader.read()`, exposes:
-      - reader.corridor (str)
-      - reader.years (list of years)
-      - reader.daily_ridership, reader.phpdt (dicts)
-      - reader.train_info (dict of coach capacities)
-      - reader.train_comp (list of coach codes)
-      - reader.params (avg_speed, section_length, reversal_time)
-      - reader.tare (tare weights and passenger weight)
-      - reader.power (traction & auxiliary power params + DF)
-      - reader.working (operational hours & days)
+      TrPower, AuxPower, Working,
+    and optionally ServicePlan: hour bands 'start-end:factor' running at the
+    peak headway times the factor, e.g. ServicePlan,6-8:1.5,8-11:1,20-24:2.
+    A file may hold any number of corridor blocks; blank rows and unknown
+    labels are skipped.
+
+    `reader.read()` parses the file in one pass and returns a CorridorConfig
+    per block (also kept in `reader.corridors`). A missing, repeated or
+    malformed row raises ValueError naming the file and line.
+
+    For single-corridor callers the fields of the first block remain
+    readable as attributes with plain dicts and lists, e.g. `reader.phpdt`.
     """
     def __init__(self, filename):
         self.filename = filename
-        self.corridor = {}
-        self.years = []
-        self.daily_ridership = {}
-        self.phpdt = {}
-        self.train_info = {}
-        self.train_comp = []
-        self.params = {}
-        self.tare = {}
-        self.power = {}
-        self.working = {}
+        self.corridors = ()
 
     def read(self):
+        corridors = []
+        block, seen = {}, {}
         with open(self.filename, newline='') as csvfile:
-            reader = csv.reader(csvfile)
-            rows = list(reader)
-            #print(len(rows))
-
-            for row in rows:
-                label = row[0].strip()
-                # Look for rows with label "Corridor"
-                if label.lower() == "corridor":
-                    try:
-                        self.corridor = row[1].strip()
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.corridor = None
-                elif label.lower() == "year":
-                    try:
-                        # Read years
-                        self.years = row[1:]
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.years = None
-                elif label.lower() == "dailyridership":
-                    try:
-                        # Daily Ridership
-                        ridership_vals = row[1:]
-                        self.daily_ridership = {year: float(val) for year, val
-                                                in zip(self.years, ridership_vals)}
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.daily_ridership = {0}
-                elif label.lower() == "phpdt":
-                    try:
-                        # PHPDT
-                        phpdt_vals = row[1:]
-                        #print(self.years)
-                        self.phpdt = {year: float(val) for year, val
-                                        in zip(self.years, phpdt_vals)}
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.phpdt = {0}
-                elif label.lower() in {"dmc", "tc"}:
-                    # For Dmc and Tc, expect three numbers:
-                    # seating capacity, AW3 standing, AW4 standing.
-                    try:
-                        self.train_info[label] = {
-                            "seat": int(row[1]) if len(row) > 1 else 0,
-                            "AW3": int(row[2]) if len(row) > 2 else 0,
-                            "AW4": int(row[3]) if len(row) > 3 else 0,
-                        }
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.train_info[label] = {"seat": 0, "AW3": 0, "AW4": 0}
-                elif label.lower() == "traincomp":
-                    # For TrainComp, assume the composition is given
-                    # as a comma-separated string in one cell. Alternatively,
-                    # if provided in multiple cells, this will also capture them.
-                    try:
-                        if len(row) == 2:
-                            comp_list = [item.strip() for item in row[1].split(',') if item.strip()]
-                        else:
-                            comp_list = [item.strip() for item in row[1:] if item.strip()]
-                        self.train_comp = comp_list
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.train_comp = ['']
-                elif label.lower() == 'parameters':
-                    # Parameters
-                    try:
-                        average_speed, section_length, reversal_time = map(float, row[1:4])
-                        self.params = {
-                            "average_speed": average_speed,
-                            "section_length": section_length,
-                            "reversal_time": reversal_time
-                        }
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.train_comp = {0}
-                elif label.lower() == 'tareweight':
-                    # Parameters
-                    try:
-                        dmc, tc, pass_wt = map(float, row[1:4])
-                        self.tare = {
-                            "DMC": dmc,
-                            "TC": tc,
-                            "MC": dmc,  # assuming DMC and MC are same weight
-                            "PassWt": pass_wt
-                        }
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.tare = {0}
-                elif label.lower() == 'trpower':
-                    # Traction power
-                    try:
-                        sec, regen, tr_loss, tr_pf, depot_tp = map(float, row[1:6])
-                        self.power = {
-                            "SEC": sec,
-                            "Regen": regen,
-                            "TrLoss": tr_loss,
-                            "TrPF": tr_pf,
-                            "DepotTP": depot_tp
-                        }
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.power = {0}
-                elif label.lower() == 'auxpower':
-                    # Traction power
-                    try:
-                        el_stn_pwr, el_stn_nos, ug_stn_pwr, ug_stn_nos, dp_pwr, dp_nos, aux_loss, aux_pf, df = map(float, row[1:10])
-                        self.power.update({
-                            "ElStnPwr": el_stn_pwr,
-                            "ElStnNos": el_stn_nos,
-                            "UGStnPwr": ug_stn_pwr,
-                            "UGStnNos": ug_stn_nos,
-                            "DpPwr": dp_pwr,
-                            "DpNos": dp_nos,
-                            "AuxLoss": aux_loss,
-                            "AuxPF": aux_pf,
-                            "DF": df
-                        })
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.power = {0}
-                elif label.lower() == 'working':
-                    try:
-                        hours, days = map(int, row[1:3])
-                        self.working = {"Hours": hours, "Days": days}
-                    except ValueError:
-                        print(f"Error converting values for {label}.")
-                        self.working = {0}
+            for line, row in enumerate(csv.reader(csvfile), start=1):
+                if not row or not row[0].strip():
+                    continue
+                label = LABELS.get(row[0].strip().lower())
+                if label is None:
+                    continue
+                if label == "Corridor" and label in seen:
+                    corridors.append(self._record(block, seen))
+                    block, seen = {}, {}
+                if label in seen:
+                    raise ValueError(f"{self.filename}, line {line}: repeated {label} row "
+                                     f"(first on line {seen[label]})")
+                seen[label] = line
+
+                field, convert = FIELDS[label]
+                try:
+                    value = convert(row[1:])
+                except ValueError as e:
+                    raise ValueError(
+                        f"{self.filename}, line {line}: invalid {label} row: {e}") from None
+                if isinstance(value, dict):
+                    block.setdefault(field, {}).update(value)
+                else:
+                    block[field] = value
+
+        if seen:
+            corridors.append(self._record(block, seen))
+        if not corridors:
+            raise ValueError(f"{self.filename}: no corridor rows found")
+        names = [config.corridor for config in corridors]
+        repeated = sorted({name for name in names if names.count(name) > 1})
+        if repeated:
+            raise ValueError(f"{self.filename}: repeated corridor names: {', '.join(repeated)}")
+        self.corridors = tuple(corridors)
+        return self.corridors
+
+    def __getattr__(self, name):
+        # Attribute API of the single-corridor reader, from the first block
+        if name in CorridorConfig._fields and self.__dict__.get('corridors'):
+            return _plain(getattr(self.corridors[0], name))
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def get(self, corridor=None):
+        """The block named `corridor`, or the first block; read() first."""
+        if corridor is None:
+            return self.corridors[0]
+        for config in self.corridors:
+            if config.corridor == corridor:
+                return config
+        raise ValueError(f"{self.filename}: no corridor named '{corridor}'")
+
+    def _record(self, block, seen):
+        name = block.get("corridor", "?")
+        missing = [label for label in FIELDS if label not in seen and label not in OPTIONAL]
+        if missing:
+            raise ValueError(f"{self.filename}: corridor '{name}' (line {min(seen.values())}) "
+                             f"is missing rows: {', '.join(missing)}")
+
+        years = block["years"]
+        for field in YEAR_SERIES:
+            if len(block[field]) != len(years):
+                raise ValueError(f"{self.filename}: corridor '{name}' has {len(block[field])} "
+                                 f"{field} values for {len(years)} years")
+            block[field] = dict(zip(years, block[field]))
+
+        return CorridorConfig(**{
+            field: MappingProxyType(value) if isinstance(value, dict) else value
+            for field, value in block.items()
+        })
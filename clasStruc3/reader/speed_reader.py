@@ -1,6 +1,87 @@
 ## reader.py
+import csv
+import os
+
 import pandas as pd
 
+
+# Parameters the simulators read, by type; other parameters are kept as
+# floats when numeric and as text otherwise
+NUMERIC_PARAMETERS = {
+    'Acceleration_rate_1', 'Acceleration_rate_2', 'Switch_speed', 'Braking_rate',
+    'Maximum_speed', 'Coasting_limit', 'Static_friction', 'Rolling_resistance',
+    'Air_resistance', 'Train_mass', 'Pass_AW3', 'Pass_AW4', 'Pass_wt', 'MC_mass',
+    'TC_mass', 'Starting_resistance', 'Inertia_mass_m', 'Inertia_mass_t',
+    'Motor_nos', 'Regeneration_efficiency', 'Stop_duration',
+}
+TEXT_PARAMETERS = {'Train_comp'}
+
+
+def _parameter_value(key, text):
+    """A parameter converted to its type; ValueError if a numeric one is not a number."""
+    if key in TEXT_PARAMETERS:
+        return text.strip()
+    try:
+        return float(text)
+    except ValueError:
+        if key in NUMERIC_PARAMETERS:
+            raise ValueError(f"{key} must be a number, got '{text.strip()}'") from None
+        return text.strip()
+
+
+def read_parameter_table(path):
+    """
+    Read a train parameter file into {stock: {parameter: value}}.
+
+    The first column names the parameter and every further column holds
+    one rolling stock, named by its header:
+        Parameter,Value                  (one stock, named after the file)
+        Parameter,Metro_A,Metro_B,...    (one stock per column)
+    The parameters the simulators read are typed (NUMERIC_PARAMETERS as
+    floats, TEXT_PARAMETERS as text) and a non-numeric value of a numeric
+    parameter raises ValueError naming the file and stock; other
+    parameters are floats when numeric and text otherwise. An empty cell
+    leaves the parameter out for that stock.
+
+    Stocks stay plain dicts rather than records: the simulators read them
+    with .get() and defaults, the SEC load cases override them with
+    {**params, ...}, the caches digest them, and files may carry extra
+    parameters.
+    """
+    with open(path, newline='') as f:
+        rows = [row for row in csv.reader(f) if row and row[0].strip()]
+    if not rows:
+        raise ValueError(f"{path}: no train parameters found")
+
+    header = [cell.strip() for cell in rows[0][1:]]
+    if header == ['Value']:
+        header = [os.path.splitext(os.path.basename(path))[0]]
+    stocks = {name: {} for name in header}
+    for row in rows[1:]:
+        key = row[0].strip()
+        for name, cell in zip(header, row[1:]):
+            if cell.strip():
+                try:
+                    stocks[name][key] = _parameter_value(key, cell)
+                except ValueError as e:
+                    raise ValueError(f"{path}: rolling stock '{name}': {e}") from None
+    return stocks
+
+
+def read_rolling_stock(paths):
+    """
+    Train parameters of every stock in a set of parameter files, as
+    {stock: {parameter: value}}; a stock name may appear in one file only.
+    """
+    stocks = {}
+    for path in paths:
+        for name, params in read_parameter_table(path).items():
+            if name in stocks:
+                raise ValueError(f"{path}: rolling stock '{name}' is already defined")
+            stocks[name] = params
+    return stocks
+
+
 class CsvDataReader:
     """
     Reads and standardizes CSV files for train parameters, stations, curves, gradients,
@@ -15,18 +96,17 @@ class CsvDataReader:
         self.gradients_path = gradients_path
         self.curve_sr_path = curve_sr_path
 
-    def read_train_parameters(self) -> dict:
-        df = pd.read_csv(self.train_params_path)
-        params = {}
-        for _, row in df.iterrows():
-            key = str(row['Parameter']).strip()
-            value = row['Value']
-            # Try to convert to float if possible
-            try:
-                params[key] = float(value)
-            except (ValueError, TypeError):
-                params[key] = str(value).strip()
-        return params
+    def read_train_parameters(self, stock=None) -> dict:
+        """
+        Parameters of one stock from the train parameter file: the named
+        stock of a multi-stock file, or its first stock.
+        """
+        stocks = read_parameter_table(self.train_params_path)
+        if stock is None:
+            return next(iter(stocks.values()))
+        if stock not in stocks:
+            raise KeyError(f"No rolling stock '{stock}' in {self.train_params_path}")
+        return stocks[stock]
 
     def read_stations(self) -> pd.DataFrame:
         df = pd.read_csv(self.stations_path)
@@ -44,16 +124,6 @@ class CsvDataReader:
         df = pd.read_csv(self.gradients_path)
         return df.rename(columns={'Start': 'start', 'End': 'end', 'Ratio': 'gradient'})
 
-    def read_curve_speed_restrictions(self) -> pd.DataFrame:
-        """
-        Reads a mapping from curve radius to max speed.
-        Expects CSV with columns 'Radius','Speed'.
-        """
-        if not self.curve_sr_path:
-            return None
-        df = pd.read_csv(self.curve_sr_path)
-        return df.rename(columns={'Radius': 'radius', 'Speed': 'speed'})
-
     def read_curve_speed_restrictions(self) -> pd.DataFrame:
         """
         Reads a mapping from curve radius to max speed.
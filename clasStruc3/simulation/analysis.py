@@ -1,12 +1,18 @@
 # File: simulation/analysis.py
 from dpr.dpr_train import TrainsRequirement
 from dpr.dpr_power import EnergyRequirement
+from dpr.dpr_fleet import FleetPowerTimeline
+from speed.cache import SegmentCache
 from speed.simulator import MetroSimulator
+from speed.track import Track
 
 
-def compute_traffic_and_energy(inputs):
+def compute_traffic_and_energy(inputs, sec=None):
     """
     Compute train capacity, headway, weight and energy demands.
+    sec: optional SEC (kWh per 1000 GTKM, e.g. from derive_sec) used in
+    place of the hand-entered TrPower SEC. The power parameters used are
+    returned as energy_data['power'].
     """
     # Unpack inputs
     capacity_info = inputs['train_info']
@@ -14,7 +20,7 @@ def compute_traffic_and_energy(inputs):
     params = inputs['params']
     tare = inputs['tare']
     train_comp = inputs['train_comp']
-    power = inputs['power']
+    power = inputs['power'] if sec is None else {**inputs['power'], 'SEC': sec}
     working = inputs['working']
     years = inputs['years']
     section_length = params['section_length']
@@ -25,9 +31,14 @@ def compute_traffic_and_energy(inputs):
     capacity, capacity_aw4, headways, trains, train_weight, axle_loads = result
 
     # Energy requirement computation
-    energy_require = EnergyRequirement(power, working, headways, section_length, train_weight, years)
+    energy_require = EnergyRequirement(power, working, headways, section_length, train_weight, years,
+                                       service_plan=inputs.get('service_plan'))
     result = energy_require.compute_dpr_data()
     energy_raw, energy_eff, aux_raw, aux_eff, total_units, max_demand = result
+    # Hour x year demand when the corridor has a service plan
+    hourly = None
+    if energy_require.service_plan:
+        hourly = energy_require.compute_hourly_demand(aux_eff, years)
 
     return (
         {
@@ -44,22 +55,99 @@ def compute_traffic_and_energy(inputs):
             'aux_raw': aux_raw,
             'aux_eff': aux_eff,
             'total_units': total_units,
-            'max_demand': max_demand
+            'max_demand': max_demand,
+            'hourly': hourly,
+            'power': power
         }
     )
 
 
-def run_simulation(inputs):
+def build_fleet(inputs, result, reverse=None):
     """
-    Initialize MetroSimulator with track and curve data and run the simulation.
+    Whole-day fleet of the simulated trip, with the return trip (when
+    given) run by the opposite direction.
+    """
+    return FleetPowerTimeline(
+        result.time, result.power, inputs['working']['Hours'],
+        reverse=(reverse.time, reverse.power) if reverse is not None else None)
+
+
+def compute_fleet_demand(inputs, traffic_data, energy_data, result, reverse=None):
+    """
+    Overlay the simulated trip power on every departure of the operating day,
+    replace the estimated max demand with the measured fleet demand and work
+    out how much regenerated energy other trains can absorb. `reverse` is the
+    simulated return trip run by the opposite direction.
     """
-    sim = MetroSimulator(
-        inputs['params_speed'],
-        inputs['stations'],
-        inputs['curves'],
-        inputs['gradients'],
-        inputs['curve_sr']
+    fleet = build_fleet(inputs, result, reverse)
+    fleet_demand = fleet.compute_peak_demand(traffic_data['headways'])
+
+    energy_require = EnergyRequirement(
+        energy_data['power'], inputs['working'], traffic_data['headways'],
+        inputs['params']['section_length'], traffic_data['train_weight'], inputs['years'],
+        fleet_demand={year: demand['max_demand'] for year, demand in fleet_demand.items()
+                      if demand is not None},
+        service_plan=inputs.get('service_plan')
     )
+    total_units, max_demand = energy_require.compute_total_energy(
+        energy_data['energy_eff'], energy_data['aux_eff'], inputs['years'])
+
+    return {
+        **energy_data,
+        'max_demand': max_demand,
+        'fleet_demand': fleet_demand,
+        'regen_sharing': fleet.compute_regen_sharing(traffic_data['headways'])
+    }
+
+
+def run_simulation(inputs, engine='step', cache_dir=None, reverse=False):
+    """
+    Initialize MetroSimulator with track and curve data and run the simulation.
+    With a cache directory, unchanged station segments are replayed from disk.
+    With reverse, the train runs from the last station back to the first.
+    Returns the SimulationResult and the train mass (t).
+    """
+    track = Track(inputs['stations'], inputs['curves'], inputs['gradients'], inputs['curve_sr'])
+    if reverse:
+        track = track.reversed()
+    sim = MetroSimulator(inputs['params_speed'], track=track)
+
+    cache = SegmentCache(cache_dir) if cache_dir else None
+    result = sim.simulate(engine=engine, cache=cache)
+    return result, sim.total_mass
+
 
-    log_df = sim.simulate()
-    return log_df, sim.total_mass
+def compute_summary(inputs, traffic_data, energy_data, result, total_mass, sec=None):
+    """
+    JSON-serialisable summary of the DPR figures and the simulated run,
+    with the simulator-derived SEC per load case when given.
+    """
+    years = {}
+    hourly = energy_data.get('hourly')
+    for i, year in enumerate(inputs['years']):
+        years[year] = {
+            'headway_min': traffic_data['headways'].get(year),
+            'trains': traffic_data['trains'].get(year),
+            'traction_energy_mwh_day': energy_data['energy_eff'].get(year),
+            'aux_energy_mwh_day': energy_data['aux_eff'].get(year),
+            'total_energy_mwh_year': energy_data['total_units'].get(year),
+            'max_demand_mw': energy_data['max_demand'].get(year),
+            'fleet_demand': energy_data.get('fleet_demand', {}).get(year),
+            'regen_sharing': energy_data.get('regen_sharing', {}).get(year),
+        }
+        if hourly is not None:
+            years[year]['hourly_demand_mw'] = hourly['demand_mw'][:, i].round(2).tolist()
+    summary = {
+        'corridor': inputs['corridor'],
+        'train_mass_t': total_mass,
+        'run': {
+            'average_speed_kmh': result.average_speed,
+            'total_distance_km': result.total_distance,
+            'total_time_min': result.total_time,
+            'energy_kwh': result.energy_kwh,
+        },
+        'years': years,
+    }
+    if sec is not None:
+        summary['sec'] = sec
+    return summary
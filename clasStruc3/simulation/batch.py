@@ -0,0 +1,179 @@
+# File: simulation/batch.py
+import glob
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from reader.dpr_reader import ConfigReader
+from simulation.setup import load_paths, read_all_inputs
+from simulation.analysis import compute_traffic_and_energy, compute_fleet_demand, run_simulation
+from simulation.incremental import BuildManifest
+from simulation.input_cache import input_key
+from simulation.reporting import generate_report_and_outputs, output_files
+
+
+def discover_corridors(corridor_dir):
+    """All corridor input files (*.csv) in a directory, sorted by name."""
+    return sorted(glob.glob(os.path.join(corridor_dir, '*.csv')))
+
+
+def corridor_blocks(corridor_file):
+    """
+    Corridors to run from one input file: the name of every block of a
+    network file, or [None] for a single-corridor file (and for a file that
+    does not parse, so that its run reports the error).
+    """
+    try:
+        names = [config.corridor for config in ConfigReader(corridor_file).read()]
+    except (OSError, ValueError):
+        return [None]
+    return names if len(names) > 1 else [None]
+
+
+def corridor_speed_dir(corridor_file, default_speed_dir):
+    """
+    Speed profile inputs of a corridor: a directory named after the
+    corridor file (e.g. csv/c10/ for csv/c10.csv) when present, otherwise
+    the shared default (see run_network, which reports the fallback).
+    """
+    own = os.path.splitext(corridor_file)[0]
+    return own if os.path.isdir(own) else default_speed_dir
+
+
+def corridor_paths(corridor_file, speed_dir, output_root, corridor=None):
+    """
+    Name, input/output paths and output directories of one corridor; a
+    block of a network file is named after the file and the corridor.
+    """
+    name = os.path.splitext(os.path.basename(corridor_file))[0]
+    if corridor is not None:
+        name = f"{name}_{re.sub(r'[^A-Za-z0-9]+', '_', corridor).strip('_')}"
+    input_dirs = {'dpr': os.path.dirname(corridor_file), 'speed': speed_dir}
+    output_dirs = {
+        'dpr': os.path.join(output_root, name, 'dpr'),
+        'speed': os.path.join(output_root, name, 'speed')
+    }
+    paths = load_paths(input_dirs, output_dirs, input_file_dpr=corridor_file)
+    if corridor is not None:
+        paths['corridor'] = corridor
+    return name, paths, output_dirs
+
+
+def run_corridor(corridor_file, speed_dir, output_root, cache_dir=None, corridor=None,
+                 segment_cache_dir=None):
+    """
+    Run the full pipeline for one corridor file (or the named corridor
+    block of a network file), writing its outputs to
+    <output_root>/<corridor name>/, and return its summary row. Parsed
+    inputs are cached in `cache_dir` and simulated segments in
+    `segment_cache_dir` when given.
+    """
+    name, paths, output_dirs = corridor_paths(corridor_file, speed_dir, output_root, corridor)
+    for path in output_dirs.values():
+        os.makedirs(path, exist_ok=True)
+
+    inputs = read_all_inputs(paths, cache_dir)
+    traffic_data, energy_data = compute_traffic_and_energy(inputs)
+    result, total_mass = run_simulation(inputs, cache_dir=segment_cache_dir)
+    reverse, _ = run_simulation(inputs, cache_dir=segment_cache_dir, reverse=True)
+    energy_data = compute_fleet_demand(inputs, traffic_data, energy_data, result, reverse)
+    generate_report_and_outputs(paths, inputs, traffic_data, energy_data, result, output_dirs)
+
+    row = {
+        'File': name,
+        'Corridor': inputs['corridor'],
+        'Status': 'ok',
+        'Train Mass (t)': total_mass,
+        'Average Speed (km/h)': result.average_speed,
+        'Total Distance (km)': result.total_distance,
+        'Total Time (min)': result.total_time,
+        'Trip Energy (kWh)': result.energy_kwh,
+    }
+    for year in inputs['years']:
+        row[f'Trains {year}'] = traffic_data['trains'].get(year)
+        row[f'Headway {year} (min)'] = traffic_data['headways'].get(year)
+        row[f'Total Energy {year} (MWh/year)'] = energy_data['total_units'].get(year)
+        row[f'Max Demand {year} (MW)'] = energy_data['max_demand'].get(year)
+    return row
+
+
+def run_network(corridor_files, speed_dir, output_root, workers=None, cache_dir=None,
+                incremental=True, segment_cache_dir=None):
+    """
+    Run every corridor in a process pool of `workers` processes (default:
+    one per CPU) and write the network summary CSV. A network file with
+    several corridor blocks runs each block as its own corridor. A corridor that fails
+    is reported in the summary with its error instead of stopping the batch.
+
+    With incremental=True, a corridor whose input files are unchanged since
+    the last batch (see <output_root>/manifest.json) and whose outputs all
+    exist is not run again; its previous summary row is reused.
+
+    A corridor file without its own speed input directory runs on the
+    shared `speed_dir`. That is logged as a warning and shown in the
+    summary's 'Speed Inputs' column ('own' or 'shared'). Parsed
+    inputs are cached in `cache_dir` and simulated segments in
+    `segment_cache_dir` when given.
+    """
+    os.makedirs(output_root, exist_ok=True)
+    manifest = BuildManifest(os.path.join(output_root, 'manifest.json'))
+    if not incremental:
+        manifest.entries = {}
+
+    rows = []
+    jobs = {}
+    speed_inputs = {}
+    for path in corridor_files:
+        corridor_speed = corridor_speed_dir(path, speed_dir)
+        shared = corridor_speed == speed_dir
+        if shared:
+            logging.warning(f"No speed inputs for {path} (expected "
+                            f"{os.path.splitext(path)[0]}/), using the shared {speed_dir}")
+        for corridor in corridor_blocks(path):
+            name, paths, output_dirs = corridor_paths(path, corridor_speed, output_root, corridor)
+            speed_inputs[name] = 'shared' if shared else 'own'
+            outputs = [f for files in output_files(paths, output_dirs).values() for f in files]
+            try:
+                fingerprint = input_key(paths)
+            except OSError:
+                fingerprint = None  # let the run report the missing file
+            if (fingerprint is not None and manifest.fresh(name, fingerprint, outputs)
+                    and manifest.get(name, 'summary')):
+                manifest.record(name, fingerprint, outputs, reused=True)
+                rows.append({**manifest.get(name, 'summary'), 'Reused': True})
+                continue
+            jobs[name] = (path, corridor_speed, corridor, fingerprint, outputs)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_corridor, path, corridor_speed, output_root, cache_dir, corridor,
+                        segment_cache_dir): name
+            for name, (path, corridor_speed, corridor, *_) in jobs.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            path, _, _, fingerprint, outputs = jobs[name]
+            try:
+                row = future.result()
+                manifest.record(name, fingerprint, outputs, reused=False, summary=row)
+                rows.append({**row, 'Reused': False})
+                logging.info(f"Corridor {name} ({path}) complete")
+            except Exception as e:
+                logging.error(f"Corridor {name} ({path}) failed: {e}", exc_info=True)
+                rows.append({
+                    'File': name,
+                    'Status': f'failed: {e}',
+                    'Reused': False,
+                })
+
+    manifest.save()
+    for row in rows:
+        row['Speed Inputs'] = speed_inputs[row['File']]
+    summary = pd.DataFrame(rows).sort_values('File').reset_index(drop=True)
+    summary_path = os.path.join(output_root, 'network_summary.csv')
+    summary.to_csv(summary_path, index=False)
+    print(f"\nNetwork summary saved at: {summary_path}")
+    return summary
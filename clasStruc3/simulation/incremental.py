@@ -0,0 +1,98 @@
+# File: simulation/incremental.py
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from simulation.input_cache import table_to_array
+from speed.result import SimulationResult
+
+
+def digest(*values):
+    """
+    Stable SHA-256 of stage inputs: nested dicts, lists, scalars, NumPy
+    arrays, DataFrames and SimulationResults.
+    """
+    h = hashlib.sha256()
+    for value in values:
+        _update(h, value)
+    return h.hexdigest()
+
+
+def _update(h, value):
+    if isinstance(value, dict):
+        h.update(b'dict%d' % len(value))
+        for key in sorted(value, key=str):
+            _update(h, str(key))
+            _update(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(b'list%d' % len(value))
+        for item in value:
+            _update(h, item)
+    elif isinstance(value, pd.DataFrame):
+        h.update(b'frame')
+        _update(h, [str(c) for c in value.columns])
+        _update(h, table_to_array(value))
+    elif isinstance(value, SimulationResult):
+        h.update(b'result')
+        _update(h, value.columns())
+        _update(h, value.summary())
+        _update(h, value.spans)
+    elif isinstance(value, np.ndarray):
+        h.update(f'array{value.dtype.str}{value.shape}'.encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    else:
+        h.update(f'{type(value).__name__}:{value!r}'.encode())
+
+
+class BuildManifest:
+    """
+    Record of the last build of each stage: the fingerprint of its inputs,
+    the files it wrote and whether they were reused. A stage whose
+    fingerprint is unchanged and whose output files all still exist does
+    not need to run again.
+    """
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def fresh(self, name, fingerprint, outputs):
+        entry = self.entries.get(name)
+        return (entry is not None
+                and entry['fingerprint'] == fingerprint
+                and entry['outputs'] == list(outputs)
+                and all(os.path.exists(path) for path in outputs))
+
+    def record(self, name, fingerprint, outputs, reused, **extra):
+        entry = dict(self.entries.get(name, {})) if reused else {}
+        entry.update(extra)
+        entry.update({
+            'fingerprint': fingerprint,
+            'outputs': list(outputs),
+            'reused': reused,
+            'checked': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        self.entries[name] = entry
+
+    def get(self, name, field, default=None):
+        return self.entries.get(name, {}).get(field, default)
+
+    @property
+    def reused(self):
+        return sorted(name for name, entry in self.entries.items() if entry.get('reused'))
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True, default=str)
+        os.replace(tmp, self.path)
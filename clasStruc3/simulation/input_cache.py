@@ -0,0 +1,134 @@
+# File: simulation/input_cache.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Source files of read_all_inputs, by their key in load_paths()
+SOURCES = ('input_file_dpr', 'train_params', 'stations', 'curves', 'gradients', 'curve_sr')
+# Inputs held as tables; every other input is a plain JSON value
+TABLES = ('stations', 'curves', 'gradients', 'curve_sr')
+FORMAT_VERSION = 2
+
+
+def file_digest(path):
+    """SHA-256 of a file's content, or None when there is no file."""
+    if not path:
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_key(paths):
+    """Content hash of every source file of read_all_inputs() and the corridor read."""
+    digests = {name: file_digest(paths.get(name)) for name in SOURCES}
+    text = json.dumps([FORMAT_VERSION, digests, paths.get('corridor')], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def table_to_array(df):
+    """A DataFrame as a NumPy structured array (text columns as fixed-width unicode)."""
+    columns = []
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if values.dtype.kind not in 'biuf':
+            values = values.astype(str)
+        columns.append((str(name), values))
+    array = np.empty(len(df), dtype=[(name, values.dtype) for name, values in columns])
+    for name, values in columns:
+        array[name] = values
+    return array
+
+
+class InputCache:
+    """
+    On-disk cache of the parsed inputs of read_all_inputs().
+
+    An entry is keyed by the content hash of every source file, so editing
+    any input file (or pointing at another one) misses the cache. It is a
+    directory holding the ConfigReader fields and train parameters as JSON
+    and each table as a structured .npy array, which is loaded instead of
+    being parsed again. Like SegmentCache, the cache is bounded by total
+    size: when it grows past `max_bytes`, the least recently used entries
+    (by modification time, refreshed on every hit) are evicted.
+    """
+    def __init__(self, directory, max_bytes=64 * 1024**2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, paths):
+        return input_key(paths)
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Return the cached inputs dict for a key, or None on a miss."""
+        entry = self.path(key)
+        try:
+            with open(os.path.join(entry, 'inputs.json')) as f:
+                inputs = json.load(f)
+            for name in TABLES:
+                if inputs.get(name) is None:
+                    continue
+                array = np.load(os.path.join(entry, f'{name}.npy'), allow_pickle=False)
+                inputs[name] = pd.DataFrame(array)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(entry)
+        self.hits += 1
+        return inputs
+
+    def put(self, key, inputs):
+        """
+        Store parsed inputs, then evict old entries beyond the size bound;
+        the entry appears atomically.
+        """
+        tmp = tempfile.mkdtemp(dir=self.directory, suffix='.tmp')
+        try:
+            values = {name: value for name, value in inputs.items() if name not in TABLES}
+            for name in TABLES:
+                table = inputs.get(name)
+                if table is None:
+                    values[name] = None
+                    continue
+                np.save(os.path.join(tmp, f'{name}.npy'), table_to_array(table))
+                values[name] = True
+            with open(os.path.join(tmp, 'inputs.json'), 'w') as f:
+                json.dump(values, f)
+            os.replace(tmp, self.path(key))
+        except OSError:
+            # Another run stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.tmp') or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,99 @@
+# File: simulation/pipeline.py
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+
+from simulation.incremental import digest
+
+
+def _timed(func, *args):
+    """Run a stage and return its result with its wall time (s)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class Pipeline:
+    """
+    Small dependency graph of pipeline stages.
+
+    Each stage is a function called with the results of its dependencies,
+    in the order they are listed. A stage starts as soon as all of its
+    dependencies are done, so independent branches run concurrently:
+    'thread' stages (I/O bound, e.g. writing docx/xlsx files) in a thread
+    pool and 'process' stages (CPU bound, e.g. the train run simulation) in
+    a process pool. Process stages, and the results they take and return,
+    must be picklable.
+
+    With a BuildManifest, a stage registered with the files it writes
+    (`outputs`) is skipped when its name and dependency results fingerprint
+    the same as in the manifest and those files still exist; its result is
+    then the list of output files.
+
+    After `run()`, `timings` holds the wall time of every stage (s),
+    `reused` the skipped stages and `elapsed` the end-to-end time.
+    """
+    KINDS = ('thread', 'process')
+
+    def __init__(self, max_workers=None, manifest=None):
+        self.max_workers = max_workers
+        self.manifest = manifest
+        self.stages = {}
+        self.timings = {}
+        self.reused = []
+        self.elapsed = None
+
+    def add(self, name, func, deps=(), kind='thread', outputs=None):
+        """Register a stage; dependencies must be added first."""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown stage kind: {kind}")
+        missing = [dep for dep in deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown stages: {missing}")
+        self.stages[name] = (func, tuple(deps), kind, outputs)
+        return self
+
+    def run(self):
+        """Run every stage and return a dict of their results by name."""
+        start = time.perf_counter()
+        pending = dict(self.stages)
+        running = {}
+        results = {}
+        fingerprints = {}
+        self.timings = {}
+        self.reused = []
+
+        with ExitStack() as stack:
+            pools = {'thread': stack.enter_context(ThreadPoolExecutor(self.max_workers))}
+            if any(kind == 'process' for _, _, kind, _ in pending.values()):
+                pools['process'] = stack.enter_context(ProcessPoolExecutor(self.max_workers))
+
+            while pending or running:
+                for name, (func, deps, kind, outputs) in list(pending.items()):
+                    if not all(dep in results for dep in deps):
+                        continue
+                    del pending[name]
+                    args = [results[dep] for dep in deps]
+                    if self.manifest is not None and outputs is not None:
+                        fingerprints[name] = digest(name, *args)
+                        if self.manifest.fresh(name, fingerprints[name], outputs):
+                            self.manifest.record(name, fingerprints[name], outputs, reused=True)
+                            results[name], self.timings[name] = list(outputs), 0.0
+                            self.reused.append(name)
+                            continue
+                    running[pools[kind].submit(_timed, func, *args)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name], self.timings[name] = future.result()
+                    if name in fingerprints:
+                        outputs = self.stages[name][3]
+                        self.manifest.record(name, fingerprints[name], outputs, reused=False)
+
+        self.elapsed = time.perf_counter() - start
+        return results
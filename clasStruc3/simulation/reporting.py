@@ -1,12 +1,31 @@
 # File: simulation/reporting.py
+# The reporting stack (python-docx, matplotlib, xlsxwriter) is imported
+# inside the stages that use it, so compute-only runs never load it.
 import os
-import pandas as pd
 
-from dpr.dpr_report import MetroReportGenerator
-from plotter.dpr_plotter import TransitPlotGenerator
-from plotter.speed_plotter import Plotter
+def output_files(paths, output_dirs):
+    """Files written by each reporting stage."""
+    return {
+        'dpr_report': [
+            paths['image_file_dpr'],
+            os.path.join(output_dirs['dpr'], 'Metro_Traffic_Report.docx'),
+        ],
+        'speed_outputs': [
+            os.path.join(output_dirs['speed'], 'run_output.xlsx'),
+            os.path.join(output_dirs['speed'], 'speed_profile.png'),
+            os.path.join(output_dirs['speed'], 'energy_profile.png'),
+        ],
+    }
+
+def generate_report_and_outputs(paths, inputs, traffic_data, energy_data, result, output_dirs):
+    generate_dpr_report(paths, inputs, traffic_data, energy_data, output_dirs)
+    write_speed_outputs(result, output_dirs)
+
+def generate_dpr_report(paths, inputs, traffic_data, energy_data, output_dirs):
+    """DPR chart and Word report."""
+    from dpr.dpr_report import MetroReportGenerator
+    from plotter.dpr_plotter import TransitPlotGenerator
 
-def generate_report_and_outputs(paths, inputs, traffic_data, energy_data, log_df, output_dirs):
     # Plot chart
     plotter = TransitPlotGenerator(
         years=inputs['years'],
@@ -30,7 +49,7 @@ def generate_report_and_outputs(paths, inputs, traffic_data, energy_data, log_df
         yearly_headways=traffic_data['headways'],
         yearly_trains=traffic_data['trains'],
         section=["Traffic Forecast", "Power Requirements"],
-        tpower=inputs['power'],
+        tpower=energy_data['power'],
         apower=inputs['power'],
         pw_labels=[
             "Traction Energy (MWh/day)",
@@ -49,6 +68,12 @@ def generate_report_and_outputs(paths, inputs, traffic_data, energy_data, log_df
 
     doc_path = report.generate()
     print(f"\nReport saved at: {doc_path}")
+    return doc_path
+
+def write_speed_outputs(result, output_dirs):
+    """Speed run Excel log with the speed and energy plots."""
+    import pandas as pd
+    from plotter.speed_plotter import Plotter
 
     # Excel output with plots
     excel_path = os.path.join(output_dirs['speed'], 'run_output.xlsx')
@@ -56,11 +81,13 @@ def generate_report_and_outputs(paths, inputs, traffic_data, energy_data, log_df
     energy_png = os.path.join(output_dirs['speed'], 'energy_profile.png')
 
     with pd.ExcelWriter(excel_path, engine='xlsxwriter') as writer:
-        log_df.to_excel(writer, index=False, sheet_name='Log')
+        # One row per second in the workbook, dwell spans included
+        result.to_frame(expand=True).to_excel(writer, index=False, sheet_name='Log')
         ws = writer.sheets['Log']
         plotter = Plotter()
-        plotter.plot(log_df, speed_png, energy_png)
+        plotter.plot(result.to_frame(), speed_png, energy_png)
         ws.insert_image('F2', speed_png)
         ws.insert_image('F30', energy_png)
 
     print(f"Run complete. Output at {excel_path}")
+    return excel_path
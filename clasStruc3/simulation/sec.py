@@ -0,0 +1,115 @@
+# File: simulation/sec.py
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from simulation.incremental import digest
+from speed.simulator import MetroSimulator
+
+# Passenger loads the SEC is derived for, by their train parameter
+LOAD_CASES = {'AW3': 'Pass_AW3', 'AW4': 'Pass_AW4'}
+# Alignment inputs of the simulation
+ALIGNMENT = ('stations', 'curves', 'gradients', 'curve_sr')
+FORMAT_VERSION = 3
+
+
+def specific_energy(energy_kwh, mass_t, distance_km):
+    """SEC in kWh per 1000 GTKM, the unit of the TrPower 'SEC' input."""
+    return energy_kwh * 1e3 / (mass_t * distance_km)
+
+
+def traction_energy(result):
+    """
+    Traction energy (kWh) of a run: the positive power only. The TrPower
+    'Regen' percentage is deducted from the SEC later, so regenerated
+    energy must not be netted off here as well.
+    """
+    power = np.clip(np.asarray(result.power, dtype=float), 0, None)
+    return float(np.trapezoid(power, x=result.time)) / 3.6e6
+
+
+def load_case_params(params_speed, load_case):
+    """Train parameters with the passenger load of a load case (AW3/AW4)."""
+    # train_mass() takes the passenger count from Pass_AW4
+    return {**params_speed, 'Pass_AW4': params_speed[LOAD_CASES[load_case]]}
+
+
+def sec_key(inputs, load_case, engine):
+    """Cache key: the train parameters, the load case, the engine and the alignment."""
+    alignment = digest(*(inputs[name] for name in ALIGNMENT))
+    return digest('sec', FORMAT_VERSION, engine, load_case,
+                  inputs['params_speed'], alignment)
+
+
+class SecCache:
+    """
+    On-disk cache of simulator-derived SEC, one small JSON file per train
+    parameters, load case and alignment.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self.path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, self.path(key))
+
+
+def simulate_sec(inputs, load_case, engine='step'):
+    """
+    Run the corridor with a load case and derive its SEC from the traction
+    energy, with the same engine as the run behind the fleet demand and
+    the speed outputs (see run_simulation).
+    """
+    sim = MetroSimulator(load_case_params(inputs['params_speed'], load_case),
+                         inputs['stations'], inputs['curves'],
+                         inputs['gradients'], inputs['curve_sr'])
+    result = sim.simulate(engine=engine)
+    traction_kwh = traction_energy(result)
+    return {
+        'sec': round(specific_energy(traction_kwh, sim.total_mass, result.total_distance), 2),
+        'traction_kwh': traction_kwh,
+        'energy_kwh': result.energy_kwh,
+        'mass_t': sim.total_mass,
+        'distance_km': result.total_distance,
+    }
+
+
+def derive_sec(inputs, load_cases=('AW3', 'AW4'), engine='step', cache_dir=None):
+    """
+    SEC of the corridor per load case, e.g. {'AW4': {'sec': .., 'traction_kwh': ..,
+    'energy_kwh': .., 'mass_t': .., 'distance_km': ..}}, where energy_kwh is the
+    net energy of the run after regeneration. With a cache directory, a load
+    case whose train parameters and alignment are unchanged is not simulated
+    again.
+    """
+    cache = SecCache(cache_dir) if cache_dir else None
+    sec = {}
+    for load_case in load_cases:
+        key = sec_key(inputs, load_case, engine)
+        entry = cache.get(key) if cache else None
+        if entry is None:
+            entry = simulate_sec(inputs, load_case, engine)
+            if cache:
+                cache.put(key, entry)
+        sec[load_case] = entry
+    return sec
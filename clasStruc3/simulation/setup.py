@@ -3,6 +3,7 @@ import os
 
 from reader.dpr_reader import ConfigReader
 from reader.speed_reader import CsvDataReader
+from simulation.input_cache import InputCache
 
 def prepare_directories():
     """Create input and output directories if they don't exist."""
@@ -23,11 +24,13 @@ def prepare_directories():
 
     return input_dirs, output_dirs
 
-def load_paths(input_dirs, output_dirs):
+def load_paths(input_dirs, output_dirs, input_file_dpr=None):
     """Build full file paths for I/O operations."""
+    if input_file_dpr is None:
+        input_file_dpr = os.path.join(input_dirs['dpr'], 'input_data.csv')
     return {
         'image_file_dpr': os.path.join(output_dirs['dpr'], 'normalised.png'),
-        'input_file_dpr': os.path.join(input_dirs['dpr'], 'input_data.csv'),
+        'input_file_dpr': input_file_dpr,
         'train_params': os.path.join(input_dirs['speed'], 'train_parameters.csv'),
         'stations': os.path.join(input_dirs['speed'], 'stations.csv'),
         'curves': os.path.join(input_dirs['speed'], 'curves.csv'),
@@ -35,12 +38,30 @@ def load_paths(input_dirs, output_dirs):
         'curve_sr': os.path.join(input_dirs['speed'], 'sr.csv'),
     }
 
-def read_all_inputs(paths):
-    """Read all input files and return a unified dictionary of usable data."""
+def read_all_inputs(paths, cache_dir=None):
+    """
+    Read all input files and return a unified dictionary of usable data.
+    With a cache directory, inputs whose files are unchanged are loaded
+    from the parsed-input cache instead of being parsed again.
+    """
+    if cache_dir is None:
+        return parse_all_inputs(paths)
 
-    # Read DPR input file
+    cache = InputCache(cache_dir)
+    key = cache.key(paths)
+    inputs = cache.get(key)
+    if inputs is None:
+        inputs = parse_all_inputs(paths)
+        cache.put(key, inputs)
+    return inputs
+
+def parse_all_inputs(paths):
+    """Parse all input files."""
+
+    # Read DPR input file; a network file holds several corridor blocks
     reader = ConfigReader(paths['input_file_dpr'])
     reader.read()
+    config = reader.get(paths.get('corridor')).to_dict()
 
     # Read speed profile input files
     reader_speed = CsvDataReader(
@@ -52,16 +73,7 @@ def read_all_inputs(paths):
     )
 
     return {
-        'corridor': reader.corridor,
-        'daily_ridership': reader.daily_ridership,
-        'train_info': reader.train_info,
-        'power': reader.power,
-        'working': reader.working,
-        'years': reader.years,
-        'phpdt': reader.phpdt,
-        'train_comp': reader.train_comp,
-        'tare': reader.tare,
-        'params': reader.params,
+        **config,
         'params_speed': reader_speed.read_train_parameters(),
         'stations': reader_speed.read_stations(),
         'curves': reader_speed.read_curves(),
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+# Bumped whenever the simulation physics change, so that segments cached
+# by an older model are not replayed
+MODEL_VERSION = 5
+
+
+def profile_slice(profile, start, end):
+    """
+    The part of a chainage profile that a train running over [start, end]
+    can see, clipped to that range so edits elsewhere do not change it.
+    """
+    if end < start:
+        start, end = end, start
+    mask = (profile.ends >= start) & (profile.starts <= end)
+    return [
+        (max(float(s), start), min(float(e), end), float(v))
+        for s, e, v in zip(profile.starts[mask], profile.ends[mask], profile.values[mask])
+    ]
+
+
+def fingerprint(*parts):
+    """Stable SHA-256 of JSON-serialisable parts."""
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def segment_key(engine, params, entry_distance, entry_speed, target, profiles):
+    """
+    Cache key of one station-to-station segment: the engine, the train
+    parameters, the entry state, the target chainage and the curves and
+    gradients between the entry point and the target. The step engine
+    enters every segment at rest at a station, so the key of a segment
+    does not depend on the segments before it.
+    """
+    return fingerprint(
+        MODEL_VERSION,
+        engine,
+        params,
+        float(entry_distance),
+        float(entry_speed),
+        float(target),
+        [profile_slice(p, entry_distance, target) for p in profiles],
+    )
+
+
+class SegmentCache:
+    """
+    On-disk cache of simulated station-to-station segments.
+
+    Each entry is one .seg file: a JSON line with the segment's summary and
+    sizes, followed by its log (with times relative to the segment start)
+    and dwell spans as raw float64, so a hit costs a single file read. The
+    cache is bounded by total size: when it grows past `max_bytes`, the
+    least recently used entries (by modification time, refreshed on every
+    hit) are evicted.
+    """
+    LOG_FIELDS = ('time', 'speed', 'distance', 'power')
+
+    def __init__(self, directory, max_bytes=256 * 1024**2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.seg")
+
+    def get(self, key):
+        """Return (log columns, summary) for a key, or None on a miss."""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                header, _, body = f.read().partition(b'\n')
+            meta = json.loads(header)
+            values = np.frombuffer(body, dtype='<f8')
+            rows = meta['rows']
+            if len(values) != rows * len(self.LOG_FIELDS) + meta['spans'] * 3:
+                return None
+        except (OSError, KeyError, ValueError):
+            return None
+        columns = {name: values[i * rows:(i + 1) * rows]
+                   for i, name in enumerate(self.LOG_FIELDS)}
+        columns['spans'] = values[len(self.LOG_FIELDS) * rows:].reshape(-1, 3)
+        os.utime(path)
+        return columns, meta['summary']
+
+    def put(self, key, columns, summary):
+        """Store a segment, then evict old entries beyond the size bound."""
+        spans = np.asarray(columns['spans'], dtype='<f8').reshape(-1, 3)
+        meta = {'summary': summary, 'rows': len(columns['time']), 'spans': len(spans)}
+        body = np.concatenate([np.asarray(columns[name], dtype='<f8') for name in self.LOG_FIELDS]
+                              + [spans.ravel()])
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json.dumps(meta).encode() + b'\n')
+            f.write(body.tobytes())
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.seg'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,116 @@
+import numpy as np
+
+from speed.profile import GRAVITY
+
+
+class SpeedEnvelope:
+    """
+    Distance-domain minimum-time speed profile for MetroSimulator.
+
+    The corridor is discretised by chainage (stations always fall on grid
+    points) and the static limit is built from the line maximum speed, the
+    curve restrictions and zero speed at every station. The achievable
+    profile is then the minimum of two envelopes in v² space:
+
+      - forward (traction): with Φ(v²) the distance needed to accelerate
+        from rest to v at the two acceleration rates split at the switch
+        speed, Φ(v²(s)) = s + cummin(Φ(limit²) - s);
+      - backward (braking): v²(s) = cummin_reversed(limit² + 2 b s) - 2 b s.
+
+    Both passes are single vectorised cumulative minima, so the cost is
+    O(track length / grid). Unlike the time-stepping engine, the train
+    brakes ahead of a restricted curve rather than snapping to its limit.
+    """
+    def __init__(self, sim, grid=2.0):
+        self.sim = sim
+        self.grid = grid
+
+    def build_grid(self, chainages):
+        """Grid positions with every station chainage on a grid point."""
+        pieces = [chainages[:1]]
+        for start, end in zip(chainages[:-1], chainages[1:]):
+            if end <= start:
+                continue
+            n = max(int(np.ceil((end - start) / self.grid)), 1)
+            pieces.append(np.linspace(start, end, n + 1)[1:])
+        return np.concatenate(pieces)
+
+    def limit(self, s, chainages):
+        """Static speed limit squared (m²/s²) at each grid point."""
+        sim = self.sim
+        limit = np.fmin(np.full(len(s), sim.max_speed_ms), sim.restrictions.at(s))
+        limit[np.isin(s, chainages)] = 0.0
+        return limit**2
+
+    def acceleration_distance(self, u):
+        """Φ: distance to accelerate from rest to v² = u."""
+        sim = self.sim
+        u_switch = min(sim.switch_speed, sim.max_speed_ms)**2
+        return np.where(u <= u_switch,
+                        u / 2 / sim.acc_rate_start,
+                        u_switch / 2 / sim.acc_rate_start
+                        + (u - u_switch) / 2 / sim.acc_rate_mid)
+
+    def speed_squared(self, phi):
+        """Inverse of Φ."""
+        sim = self.sim
+        u_switch = min(sim.switch_speed, sim.max_speed_ms)**2
+        phi_switch = u_switch / 2 / sim.acc_rate_start
+        return np.where(phi <= phi_switch,
+                        2 * sim.acc_rate_start * phi,
+                        u_switch + 2 * sim.acc_rate_mid * (phi - phi_switch))
+
+    def forward(self, s, u_limit):
+        phi = s + np.minimum.accumulate(self.acceleration_distance(u_limit) - s)
+        return self.speed_squared(phi)
+
+    def backward(self, s, u_limit):
+        b = self.sim.braking_deceleration
+        return np.minimum.accumulate((u_limit + 2 * b * s)[::-1])[::-1] - 2 * b * s
+
+    def run(self):
+        """Compute the profile and log it into the simulator's log."""
+        sim = self.sim
+        chainages = np.unique(sim.track.chainages)
+        s = self.build_grid(chainages)
+        u_limit = self.limit(s, chainages)
+        v = np.sqrt(np.maximum(np.minimum(self.forward(s, u_limit),
+                                          self.backward(s, u_limit)), 0.0))
+
+        # Cell kinematics: constant acceleration between grid points
+        ds = np.diff(s)
+        v_sum = v[:-1] + v[1:]
+        dt = np.divide(2 * ds, v_sum, out=np.zeros_like(ds), where=v_sum > 0)
+        acc = (v[1:]**2 - v[:-1]**2) / 2 / ds
+        v_mid = v_sum / 2
+
+        # Tractive effort against inertia, Davis resistance and gradient
+        grade = sim.gradient_profile.at(s[:-1] + ds / 2)
+        force = (sim.total_mass * 1000 * acc
+                 + sim.coasting_deacelerate(v_mid)
+                 + sim.total_mass * 1000 * GRAVITY * grade)
+        cell_power = np.where(force > 0, force * v_mid,
+                              force * v_mid * sim.regeneration_efficiency)
+        power = np.append(cell_power, 0.0)
+
+        # Dwell at every station after the first
+        stops = np.flatnonzero(np.isin(s, chainages))[1:]
+        dwell = np.zeros(len(s))
+        dwell[stops] = sim.stop_duration
+        time = sim.time + np.concatenate([[0.0], np.cumsum(dt)]) \
+            + np.cumsum(dwell) - dwell
+
+        # Each stop is logged on arrival (no power) and again on departure
+        departure_power = power[stops]
+        power[stops] = 0.0
+        rows = np.insert(np.arange(len(s)), stops + 1, stops)
+        time_rows = time[rows]
+        power_rows = power[rows]
+        inserted = stops + np.arange(1, len(stops) + 1)
+        time_rows[inserted] += sim.stop_duration
+        power_rows[inserted] = departure_power
+
+        sim.log.extend(time_rows, v[rows] * 18 / 5, s[rows], power_rows)
+        sim.time = time_rows[-1]
+        sim.distance = s[-1]
+        sim.speed = 0.0
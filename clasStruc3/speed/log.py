@@ -0,0 +1,150 @@
+import numpy as np
+
+
+def span_repeats(size, spans):
+    """
+    Row repeat counts and per-row time offsets (s) that expand `size`
+    compact rows with run-length encoded `spans` to every sample.
+    """
+    repeats = np.ones(size, dtype=int)
+    step = np.zeros(size)
+    if len(spans):
+        first = spans[:, 0].astype(int)
+        repeats[first] = spans[:, 1].astype(int) - 1
+        step[first] = spans[:, 2]
+    block_start = np.cumsum(repeats) - repeats
+    index = np.arange(repeats.sum()) - np.repeat(block_start, repeats)
+    return repeats, index * np.repeat(step, repeats)
+
+
+class SimulationLog:
+    """
+    Compact store for the per-step simulation log.
+
+    Samples are kept in four preallocated float64 columns (32 bytes per
+    sample) that grow geometrically when full, so appends are amortised O(1)
+    and no boxed Python floats are held. `columns()` hands the filled part
+    of each buffer over as views, without copying.
+
+    Runs of identical samples (a station dwell) are recorded with `hold()`
+    as spans: only the first and last sample are stored, together with a
+    (first row, sample count, step) entry; `span_repeats()` restores every
+    sample on request.
+    """
+    FIELDS = ('time', 'speed', 'distance', 'power')
+
+    def __init__(self, capacity=4096):
+        self.size = 0
+        self._time = np.empty(capacity)
+        self._speed = np.empty(capacity)
+        self._distance = np.empty(capacity)
+        self._power = np.empty(capacity)
+        self._spans = []
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return len(self._time)
+
+    @property
+    def nbytes(self):
+        return self.capacity * len(self.FIELDS) * 8
+
+    def reserve(self, capacity):
+        """Grow the buffers so they can hold at least `capacity` samples."""
+        if capacity <= self.capacity:
+            return
+        new_capacity = max(capacity, 2 * self.capacity)
+        for name in ('_time', '_speed', '_distance', '_power'):
+            old = getattr(self, name)
+            new = np.empty(new_capacity)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append(self, time, speed, distance, power):
+        i = self.size
+        if i == self.capacity:
+            self.reserve(i + 1)
+        self._time[i] = time
+        self._speed[i] = speed
+        self._distance[i] = distance
+        self._power[i] = power
+        self.size = i + 1
+
+    def extend(self, time, speed, distance, power):
+        """Append whole arrays of samples at once."""
+        n = len(time)
+        i = self.size
+        self.reserve(i + n)
+        self._time[i:i + n] = time
+        self._speed[i:i + n] = speed
+        self._distance[i:i + n] = distance
+        self._power[i:i + n] = power
+        self.size = i + n
+
+    def hold(self, time, speed, distance, power, count, step=1.0):
+        """
+        Record `count` samples `step` seconds apart at constant speed (km/h)
+        and power, starting at `time`, as one span. A first sample equal to
+        the last logged one is not repeated.
+        """
+        if count <= 0:
+            return
+        if step <= 0:
+            count = 1
+        first = (time, speed, distance, power)
+        if self.last() == first:
+            row = self.size - 1
+        else:
+            row = self.size
+            self.append(*first)
+        if count > 1:
+            duration = (count - 1) * step
+            self.append(time + duration, speed, distance + speed / 3.6 * duration, power)
+        if count > 2:
+            self._spans.append((row, count, step))
+
+    @property
+    def spans(self):
+        """(first row, sample count, step) of every span, as an (n, 3) array."""
+        return np.array(self._spans, dtype=float).reshape(-1, 3)
+
+    def spans_since(self, row):
+        """Spans starting at or after `row`, with rows relative to it."""
+        spans = self.spans
+        spans = spans[spans[:, 0] >= row]
+        spans[:, 0] -= row
+        return spans
+
+    def add_spans(self, spans, offset):
+        """Register spans of samples appended with `extend()` at row `offset`."""
+        self._spans.extend((int(r) + offset, int(n), float(s)) for r, n, s in spans)
+
+    def last(self):
+        """The most recent sample as a (time, speed, distance, power) tuple."""
+        if not self.size:
+            return None
+        i = self.size - 1
+        return (self._time[i], self._speed[i], self._distance[i], self._power[i])
+
+    @property
+    def time(self):
+        return self._time[:self.size]
+
+    @property
+    def speed(self):
+        return self._speed[:self.size]
+
+    @property
+    def distance(self):
+        return self._distance[:self.size]
+
+    @property
+    def power(self):
+        return self._power[:self.size]
+
+    def columns(self):
+        """Return the logged samples as a dict of zero-copy column views."""
+        return {name: getattr(self, name) for name in self.FIELDS}
@@ -0,0 +1,123 @@
+import bisect
+
+import numpy as np
+
+GRAVITY = 9.81  # m/s²
+
+
+class IntervalProfile:
+    """
+    Chainage-indexed piecewise-constant profile built once from a table of
+    [start, end] intervals. Lookups use binary search for arbitrary
+    positions and a forward-moving cursor for the simulators, since a train
+    only ever moves forward along the alignment.
+
+    Intervals are inclusive at both ends and are assumed not to overlap
+    beyond a shared endpoint; on a shared endpoint the interval that starts
+    first wins.
+    """
+    def __init__(self, starts, ends, values, default=None):
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        values = np.asarray(values, dtype=float)
+        order = np.argsort(starts, kind='stable')
+
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.values = values[order]
+        self.default = default
+        for arr in (self.starts, self.ends, self.values):
+            arr.setflags(write=False)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def at(self, distances):
+        """
+        Vectorised lookup. Returns a float array with NaN (or the default,
+        when it is numeric) wherever a position lies outside every interval.
+        """
+        distances = np.asarray(distances, dtype=float)
+        fill = np.nan if self.default is None else float(self.default)
+        out = np.full(distances.shape, fill)
+        if not len(self):
+            return out
+
+        idx = np.searchsorted(self.starts, distances, side='right') - 1
+        valid = idx >= 0
+        idx = np.clip(idx, 0, None)
+        # Prefer the earlier interval when it still covers a shared endpoint
+        prev = np.clip(idx - 1, 0, None)
+        use_prev = valid & (idx > 0) & (distances <= self.ends[prev])
+        idx = np.where(use_prev, prev, idx)
+        inside = valid & (distances <= self.ends[idx])
+        out[inside] = self.values[idx[inside]]
+        return out
+
+    def cursor(self):
+        """Return a new forward-moving lookup over this profile."""
+        return ProfileCursor(self)
+
+
+class ProfileCursor:
+    """
+    O(1) amortised lookup for monotonically increasing positions. Falls back
+    to a binary search if asked about a position behind the previous one.
+    """
+    def __init__(self, profile):
+        self.profile = profile
+        # Plain lists: scalar indexing is much cheaper than on NumPy arrays
+        self.starts = profile.starts.tolist()
+        self.ends = profile.ends.tolist()
+        self.values = profile.values.tolist()
+        self.index = 0
+        self.last = -np.inf
+
+    def __call__(self, distance):
+        ends = self.ends
+        n = len(ends)
+        if distance < self.last:
+            self.index = bisect.bisect_left(ends, distance)
+        self.last = distance
+
+        while self.index < n and ends[self.index] < distance:
+            self.index += 1
+        if self.index < n and self.starts[self.index] <= distance:
+            return self.values[self.index]
+        return self.profile.default
+
+
+def restriction_profile(curves, curve_sr):
+    """
+    Resolve every curve to its speed restriction (m/s) through the
+    radius -> speed mapping. Curves whose radius has no entry in the mapping
+    carry no restriction and are dropped.
+    """
+    if curves is None or curve_sr is None or curves.empty:
+        return IntervalProfile([], [], [])
+
+    limits = {}
+    for radius, speed in zip(curve_sr['radius'], curve_sr['speed']):
+        limits.setdefault(float(radius), float(speed) * 1000 / 3600)
+
+    starts, ends, values = [], [], []
+    for start, end, radius in zip(curves['start'], curves['end'], curves['radius']):
+        limit = limits.get(float(radius))
+        if limit is None:
+            continue
+        starts.append(start)
+        ends.append(end)
+        values.append(limit)
+    return IntervalProfile(starts, ends, values)
+
+
+def gradient_profile(gradients):
+    """
+    Gradient (as a fraction, positive rising) along the alignment. The
+    'gradient' column is read as a percentage; chainages outside every
+    section are treated as level.
+    """
+    if gradients is None or gradients.empty:
+        return IntervalProfile([], [], [], default=0.0)
+    return IntervalProfile(gradients['start'], gradients['end'],
+                           gradients['gradient'].astype(float) / 100, default=0.0)
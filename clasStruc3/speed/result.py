@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from speed.log import span_repeats
+
+
+class SimulationResult:
+    """
+    Outcome of one simulated run.
+
+    The summary figures are held once as scalars and the log as four NumPy
+    columns (time in s, speed in km/h, distance in m, power in W), with
+    dwell periods run-length encoded as `spans` (see SimulationLog). A
+    pandas DataFrame is only built on request by `to_frame()`.
+    """
+    __slots__ = ('time', 'speed', 'distance', 'power', 'spans',
+                 'average_speed', 'total_distance', 'total_time', 'energy_kwh')
+
+    # DataFrame column labels, as written to the Excel log
+    LABELS = {
+        'time': 'Time (s)',
+        'speed': 'Speed (m/s)',
+        'distance': 'Distance',
+        'power': 'Energy (kJ)',
+    }
+
+    def __init__(self, time, speed, distance, power, average_speed,
+                 total_distance, total_time, energy_kwh=None, spans=None):
+        """
+        Parameters:
+            time, speed, distance, power (array): Logged columns.
+            average_speed (float): Average corridor speed (km/h).
+            total_distance (float): Corridor length (km).
+            total_time (float): Run time (min).
+            energy_kwh (float): Energy consumed over the run (kWh).
+            spans (array): (first row, sample count, step) per encoded span.
+        """
+        self.time = time
+        self.speed = speed
+        self.distance = distance
+        self.power = power
+        self.spans = np.zeros((0, 3)) if spans is None else np.asarray(spans, dtype=float)
+        self.average_speed = float(average_speed)
+        self.total_distance = float(total_distance)
+        self.total_time = float(total_time)
+        self.energy_kwh = None if energy_kwh is None else float(energy_kwh)
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.LABELS) + self.spans.nbytes
+
+    def columns(self, expand=False):
+        """The log columns as a dict; with expand=True, one row per sample."""
+        columns = {name: getattr(self, name) for name in self.LABELS}
+        if not expand or not len(self.spans):
+            return columns
+        repeats, offset = span_repeats(len(self), self.spans)
+        columns = {name: np.repeat(values, repeats) for name, values in columns.items()}
+        columns['time'] += offset
+        columns['distance'] += columns['speed'] / 3.6 * offset
+        return columns
+
+    def summary(self):
+        """The summary figures, keyed like the DataFrame columns."""
+        return {
+            'Average Speed (km/h)': self.average_speed,
+            'Total Distance (km)': self.total_distance,
+            'Total Time (min)': self.total_time,
+        }
+
+    def to_frame(self, expand=False):
+        """
+        The log as a DataFrame, with the summary figures repeated on every
+        row as in the Excel output. With expand=True dwell spans are written
+        out as one row per second.
+        """
+        columns = self.columns(expand)
+        return pd.DataFrame({
+            **{self.LABELS[name]: values for name, values in columns.items()},
+            **self.summary(),
+        }, copy=False)
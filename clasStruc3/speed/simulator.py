@@ -1,33 +1,108 @@
 import numpy as np
 import pandas as pd
 
+from speed.cache import fingerprint, profile_slice, segment_key
+from speed.envelope import SpeedEnvelope
+from speed.log import SimulationLog, span_repeats
+from speed.profile import GRAVITY
+from speed.result import SimulationResult
+from speed.track import Track
+
+
+def train_mass(params):
+    """
+    Compute total train mass from composition string and per-coach masses,
+    plus passenger weight if provided.
+    Expects parameters:
+      - Train_comp: e.g. "DTD"
+      - MC_mass, TC_mass: floats in tons
+      - Pass_AW4: number of passengers
+      - Pass_wt: average weight per passenger (kg)
+    Letter mapping:
+      D → DMC (use MC_mass)
+      M → MC  (use MC_mass)
+      T → TC  (use TC_mass)
+    """
+
+    # Extract values
+    train_comp = params.get('Train_comp', 0.0)
+    mc_mass = float(params.get('MC_mass', 0.0))
+    tc_mass = float(params.get('TC_mass', 0.0))
+    pass_nos = float(params.get('Pass_AW4', 0.0))
+    pass_wt = float(params.get('Pass_wt', 0.0))
+
+    if mc_mass is None or tc_mass is None:
+        raise KeyError("MC_mass and TC_mass must be present in train_parameters.csv")
+
+    # Tare weight of Train
+    total_mass = 0.0
+    for letter in train_comp:
+        if letter.upper() in ("D", "M"):
+            total_mass += mc_mass
+        elif letter.upper() == "T":
+            total_mass += tc_mass
+        else:
+            raise ValueError(f"Unknown coach type: {letter}")
+
+    # Include Passenger weight
+    #print(f'Pass: {pass_nos}\t Weight:{pass_wt}')
+    total_mass += pass_nos * pass_wt /1000
+    return total_mass
+
 
 class MetroSimulator:
     """
     Simulates a train run: acceleration, coasting, braking (including
     deceleration for curves based on radius), and station dwell.
     Logs time, position, speed, and energy.
+
+    The corridor is held in a read-only Track and the run state is reset by
+    `run()`, so one simulator can run any number of parameter sets.
     """
-    def __init__(self, params: dict, stations: pd.DataFrame,
+    def __init__(self, params: dict, stations: pd.DataFrame = None,
                  curves: pd.DataFrame = None, gradients: pd.DataFrame = None,
-                 curve_sr: pd.DataFrame = None):
-        # Store input parameters and data tables
-        self.params = params
-        self.stations = stations.sort_values('chainage').reset_index(drop=True)
-        self.curves = curves
-        self.gradients = gradients
-        self.curve_sr = curve_sr
+                 curve_sr: pd.DataFrame = None, track: Track = None):
+        # Corridor tables, sorted and resolved once; pass a shared Track to
+        # skip this for repeated simulators over the same corridor
+        self.track = track if track is not None else Track(stations, curves, gradients, curve_sr)
+        self.stations = self.track.stations
+        self.curves = self.track.curves
+        self.gradients = self.track.gradients
+        self.curve_sr = self.track.curve_sr
+        self.restrictions = self.track.restrictions
+        self.gradient_profile = self.track.gradient_profile
+
+        self.params = None
+        self.reset(params)
+
+    def reset(self, params=None):
+        """
+        Start a new run from the first station, optionally with new train
+        parameters. Given parameters are always re-derived, so a dict edited
+        in place and passed again takes effect. The previous log is left
+        untouched, so results already returned stay valid.
+        """
+        if params is not None:
+            self.set_params(params)
+
+        # Forward-moving profile lookups for this run
+        self._restriction_at = self.restrictions.cursor()
+        self._gradient_at = self.gradient_profile.cursor()
 
         # Log the train running parameters
-        self.time_log = []
-        self.speed_log = []
-        self.distance_log = []
-        self.energy_log = []
+        self.log = SimulationLog()
 
         # Initialize simulation state
         self.distance = 0
         self.time = 0
         self.speed = 0
+        self.acc_rate = 0
+
+    def set_params(self, params: dict):
+        """
+        Derive the per-train quantities from a train parameter set.
+        """
+        self.params = params
 
         # Read acceleration/braking parameters
         self.acc_rate_start = params.get('Acceleration_rate_1', 0.0)
@@ -41,7 +116,6 @@ class MetroSimulator:
         # Precompute distances needed to accelerate/brake
         self.accelerating_distance = self.max_speed_ms**2/2/self.acc_rate_mid
         self.braking_distance = self.max_speed_ms**2/2/self.braking_deceleration
-        self.acc_rate = 0
 
         # Station dwell and coasting parameters
         self.stop_duration = params.get('Stop_duration',30)
@@ -60,58 +134,16 @@ class MetroSimulator:
 
     def calculate_train_mass(self):
         """
-        Compute total train mass from composition string and per-coach masses,
-        plus passenger weight if provided.
-        Expects parameters:
-          - Train_comp: e.g. "DTD"
-          - MC_mass, TC_mass: floats in tons
-          - Pass_AW4: number of passengers
-          - Pass_wt: average weight per passenger (kg)
-        Letter mapping:
-          D → DMC (use MC_mass)
-          M → MC  (use MC_mass)
-          T → TC  (use TC_mass)
-        """
-
-        # Extract values
-        train_comp = self.params.get('Train_comp', 0.0)
-        mc_mass = float(self.params.get('MC_mass', 0.0))
-        tc_mass = float(self.params.get('TC_mass', 0.0))
-        pass_nos = float(self.params.get('Pass_AW4', 0.0))
-        pass_wt = float(self.params.get('Pass_wt', 0.0))
-
-        if mc_mass is None or tc_mass is None:
-            raise KeyError("MC_mass and TC_mass must be present in train_parameters.csv")
-
-        # Tare weight of Train
-        total_mass = 0.0
-        for letter in train_comp:
-            if letter.upper() in ("D", "M"):
-                total_mass += mc_mass
-            elif letter.upper() == "T":
-                total_mass += tc_mass
-            else:
-                raise ValueError(f"Unknown coach type: {letter}")
-
-        # Include Passenger weight
-        #print(f'Pass: {pass_nos}\t Weight:{pass_wt}')
-        total_mass += pass_nos * pass_wt /1000
-        return total_mass
+        Compute total train mass (tons) for this run's parameters.
+        """
+        return train_mass(self.params)
 
     def get_speed_restriction(self):
         """
         If the train's current distance lies within any curve segment,
         return the speed restriction (m/s) for that curve's radius.
         """
-        for _, row in self.curves.iterrows():
-            if row['start'] <= self.distance <= row['end']:
-                radius = row['radius']
-                matched = self.curve_sr[self.curve_sr['radius'] == radius]
-                if not matched.empty:
-                    speed = matched.iloc[0]['speed']  # or 'restrict_speed'
-                    #print(f"SR for radius {radius}: {speed}")
-                    return speed * 1000 / 3600  # convert km/h to m/s
-        return None
+        return self._restriction_at(self.distance)
 
     def coasting_deacelerate(self, speed):
         """
@@ -131,12 +163,22 @@ class MetroSimulator:
         self.speed += self.acc_rate * time_step
         return min(self.speed, self.max_speed_ms)
 
+    def gradient_force(self):
+        """
+        Gravity component along the track at the current position (N),
+        positive on a rising gradient.
+        """
+        return self.total_mass * 1000 * GRAVITY * self._gradient_at(self.distance)
+
     def coast(self, time_step):
         """
-        Reduce speed by resistive forces while coasting.
+        Reduce speed by resistive forces and gradient while coasting.
+        On a falling gradient the train is held at the maximum speed.
         """
         #print(f'Speed:{speed}, Time Step:{time_step}')
-        self.speed -= self.coasting_deacelerate(self.speed) / self.total_mass / 1000 * time_step
+        resistance = self.coasting_deacelerate(self.speed) + self.gradient_force()
+        self.speed -= resistance / self.total_mass / 1000 * time_step
+        self.speed = min(self.speed, self.max_speed_ms)
         return
 
     def brake(self, time_step):
@@ -152,9 +194,10 @@ class MetroSimulator:
         """
         #print(f'')
         power = 0
+        previous = self.speed
         self.speed = self.accelerate(time_step)
         self.distance += self.speed * time_step
-        power = self.power_consumed()
+        power = self.power_consumed(previous, time_step)
         self.log_data(power)
         segment_time += time_step
         self.time += time_step
@@ -164,27 +207,31 @@ class MetroSimulator:
         """
         Once the train attains the maximum speed, Acceleration is turned coefficients.
 
-        If the train enters a speed restricted (SR) zone, the speed reduces to SR.
+        If the train enters a speed restricted (SR) zone, the speed reduces to SR,
+        or the train accelerates up to SR, and is then held at SR.
         """
-        # Flag to indicate when we should continue accelerating to reach max speed
-        should_accelerate = False
         power = 0
-        # Check if the speed has fallen below coasting limit
-        if self.speed > self.coasting_limit * self.max_speed_ms and not should_accelerate:
+        previous = self.speed
+        speed_limit = self.get_speed_restriction()
+        if speed_limit:
+            # Run at the restriction speed: drop to it on entry, otherwise
+            # accelerate up to it and hold it against resistance and gradient
+            cap = min(speed_limit, self.max_speed_ms)
+            if self.speed < cap:
+                self.speed = min(self.accelerate(time_step), cap)
+                power = self.power_consumed(previous, time_step)
+            elif self.speed == cap:
+                force = max(self.coasting_deacelerate(cap) + self.gradient_force(), 0)
+                power = force * cap
+            self.speed = min(self.speed, cap)
+        # Coast until the speed falls to the coasting limit, then accelerate
+        # back towards the maximum speed
+        elif self.speed > self.coasting_limit * self.max_speed_ms:
             self.coast(time_step)
         else:
-            should_accelerate = True
             self.speed = self.accelerate(time_step)
-            # Stop acceleration if speed goes above maxm speed
-            if self.speed >= self.max_speed_ms:
-                should_accelerate = False
-        # Power consumed only during acceleration
-        if not should_accelerate:
-            power = self.power_consumed()
-
-        speed_limit = self.get_speed_restriction()
-        if speed_limit:
-            self.speed = speed_limit
+            # Traction power is drawn only while accelerating
+            power = self.power_consumed(previous, time_step)
         self.distance += self.speed * time_step
         self.log_data(power)
         segment_time += time_step
@@ -198,101 +245,195 @@ class MetroSimulator:
         power = 0
         self.speed = self.brake(time_step)
         self.distance += self.speed * time_step
-        power = self.power_consumed() * self.regeneration_efficiency * -1
+        power = self.braking_power() * self.regeneration_efficiency * -1
         self.log_data(power)
         segment_time += time_step
         self.time += time_step
         return  segment_time
 
-    def power_consumed(self):
+    def power_consumed(self, previous, time_step):
         """
-        Instantaneous power: P = F * v  where F = m * acc_rate
-        Returns Watts.
+        Mean traction power over a step from speed `previous`: P = F * v where
+        F = m * a + gradient force, a is the speed change actually made in the
+        step (capped at the maximum speed) and v the mean speed over it.
+        Returns Watts (no traction draw when the gradient alone suffices).
         """
-        force = self.total_mass * 1000 * self.acc_rate  # Force in Newtons
-        power = force * self.speed  # Power in Watts
+        acceleration = (self.speed - previous) / time_step
+        force = self.total_mass * 1000 * acceleration  # Force in Newtons
+        force = max(force + self.gradient_force(), 0)
+        power = force * (self.speed + previous) / 2  # Power in Watts
         return power
 
+    def braking_power(self):
+        """
+        Braking power available for regeneration: P = F * v  where
+        F = m * braking rate - gradient force (a rising gradient helps to stop).
+        Returns Watts.
+        """
+        force = self.total_mass * 1000 * self.braking_deceleration  # Force in Newtons
+        force = max(force - self.gradient_force(), 0)
+        return force * self.speed
+
     def log_data(self, power):
         """
         Record current time, speed, distance, and energy (from power input regens).
         Speed logged in km/h.
         """
-        self.time_log.append(self.time)
-        self.speed_log.append(self.speed*18/5)
-        self.distance_log.append(self.distance)
-        self.energy_log.append(power)
+        self.log.append(self.time, self.speed*18/5, self.distance, power)
 
-    def energy_consumed_in_run(self, time_step):
+    def energy_consumed_in_run(self, time_step=None):
         """
         Integrate power log to find total energy (kWh).
+        With no fixed time step, integrate over the logged times.
         """
         # Numerical integration of power to get energy in Joules
-        energy_consumed = np.trapezoid(self.energy_log, dx=time_step)
+        if time_step is None:
+            energy_consumed = np.trapezoid(self.log.power, x=self.log.time)
+        else:
+            # A fixed step counts samples, so dwell spans are expanded first
+            repeats, _ = span_repeats(len(self.log), self.log.spans)
+            energy_consumed = np.trapezoid(np.repeat(self.log.power, repeats), dx=time_step)
         # Convert energy from Joules to kWh
         energy_consumed_kwh = energy_consumed / 3.6/10e5
 
         print(f"Total energy consumed during the run: {energy_consumed_kwh:.3f} kWh")
+        return energy_consumed_kwh
 
     def average_corridor_speed(self):
         '''
         Computes the average speed for the average_corridor_speed
         '''
-        total_distance = self.stations.iloc[-1]['chainage'] - self.stations.iloc[0]['chainage']
+        total_distance = self.track.length
         average_speed = total_distance / self.time
         #print(f"A total distance of {total_distance/1000:.2f} Km was covered in {self.time/60:.2f} minutes.")
         #print(f"Average speed for the trip was: {average_speed*18/5:.2f} km/hr")
 
         return average_speed, total_distance, self.time
 
-    def simulate(self):
-        """
-        Full run simulation over all station segments.
-        """
-        dt = 1  # time step in seconds
-        next_station_idx = 1
-
-        # Calculate segment length
-        while next_station_idx < len(self.stations):
-            next_station_dist = self.stations.iloc[next_station_idx]['chainage']
-            segment_distance = next_station_dist - self.distance
-            local_distance = 0
-            segment_time = 0
-
-            #print(f'Start Acceleration at Time:{self.time} and Speed:{self.speed*18/5}')
-            # 1) Accelerate up to max speed
-            while self.speed < self.max_speed_ms:
-                segment_time = self.accelerate_phase(segment_time, dt)
-                local_distance += self.speed * dt
-            #print(f'Start Coasting at Time:{self.time} and Speed:{self.speed*18/5}')
-            # 2) Coast until braking point, enforce speed restrictions
-            while local_distance < (segment_distance - self.braking_distance):
-                segment_time = self.coast_phase(local_distance, segment_time, dt)
-                local_distance += self.speed * dt
-            #print(f'Start Braking atTime:{self.time} and Speed:{self.speed*18/5}')
-            # 3) Brake to stop at station
-            while self.speed > 0:
-                segment_time = self.brake_phase(segment_time, dt)
-                local_distance += self.speed * dt
-            # 4) Dwell at station
-            for _ in range(int(self.stop_duration)):
-                self.time += 1
-                self.log_data(0)
-            # Advance to next station
-            next_station_idx += 1
+    def run_step_segment(self, next_station_dist, dt):
+        """
+        Advance one station segment with a fixed time step, then dwell.
+        """
+        segment_distance = next_station_dist - self.distance
+        local_distance = 0
+        segment_time = 0
+
+        #print(f'Start Acceleration at Time:{self.time} and Speed:{self.speed*18/5}')
+        braking_point = lambda: segment_distance - self.speed**2 / 2 / self.braking_deceleration
+        # 1) Accelerate up to max speed, or to the braking point of a short segment
+        while self.speed < self.max_speed_ms and local_distance < braking_point():
+            segment_time = self.accelerate_phase(segment_time, dt)
+            local_distance += self.speed * dt
+        #print(f'Start Coasting at Time:{self.time} and Speed:{self.speed*18/5}')
+        # 2) Coast until the braking point for the current speed, enforce
+        # speed restrictions
+        while local_distance < braking_point():
+            segment_time = self.coast_phase(local_distance, segment_time, dt)
+            local_distance += self.speed * dt
+        #print(f'Start Braking atTime:{self.time} and Speed:{self.speed*18/5}')
+        # 3) Brake to stop at station
+        while self.speed > 0:
+            segment_time = self.brake_phase(segment_time, dt)
+            local_distance += self.speed * dt
+        # Stop at the platform: the 1 s braking rounding (a few metres) does
+        # not carry into the next segment, which always starts at rest at
+        # the station
+        self.distance = next_station_dist
+        # 4) Dwell at station, logged as one span of 1 s samples
+        dwell = int(self.stop_duration)
+        self.log.hold(self.time + 1, self.speed*18/5, self.distance, 0, dwell)
+        self.time += dwell
+
+    def run_cached_segment(self, cache, engine, target, run_segment):
+        """
+        Replay a segment from the cache when its inputs are unchanged,
+        otherwise simulate it and store the result.
+        """
+        profiles = (self.restrictions, self.gradient_profile)
+        key = segment_key(engine, self.params, self.distance, self.speed, target, profiles)
+        entry = cache.get(key)
+        if entry is not None:
+            columns, summary = entry
+            # The run may overshoot the station; that stretch must match too
+            tail = [profile_slice(p, target, summary['exit_distance']) for p in profiles]
+            if fingerprint(tail) == summary['tail']:
+                cache.hits += 1
+                self.log.add_spans(columns['spans'], len(self.log))
+                self.log.extend(columns['time'] + self.time, columns['speed'],
+                                columns['distance'], columns['power'])
+                self.time += summary['duration']
+                self.distance = summary['exit_distance']
+                self.speed = summary['exit_speed']
+                self.acc_rate = summary['exit_acc_rate']
+                return
+
+        cache.misses += 1
+        start_row, start_time = len(self.log), self.time
+        run_segment(target)
+        columns = {name: values[start_row:].copy()
+                   for name, values in self.log.columns().items()}
+        columns['time'] -= start_time
+        columns['spans'] = self.log.spans_since(start_row)
+        tail = [profile_slice(p, target, self.distance) for p in profiles]
+        cache.put(key, columns, {
+            'duration': float(self.time - start_time),
+            'exit_distance': float(self.distance),
+            'exit_speed': float(self.speed),
+            'exit_acc_rate': float(self.acc_rate),
+            'energy_kwh': float(np.trapezoid(columns['power'], x=columns['time'])) / 3.6/10e5,
+            'tail': fingerprint(tail),
+        })
+
+    def simulate(self, engine='step', cache=None):
+        """
+        Full run simulation over all station segments. Returns a
+        SimulationResult.
+
+        engine:
+          - 'step': fixed 1 s time step through the acceleration, coasting
+            and braking phases.
+          - 'envelope': distance-domain minimum-time profile, see SpeedEnvelope.
+
+        cache: optional SegmentCache. With the 'step' engine, each
+        station-to-station segment whose inputs are unchanged is replayed
+        from the cache instead of being simulated again.
+        """
+        if engine == 'step':
+            dt = 1  # time step in seconds
+            run_segment = lambda target: self.run_step_segment(target, dt)
+        elif engine == 'envelope':
+            dt = None  # irregular log, integrate over logged times
+            run_segment = None
+            SpeedEnvelope(self).run()
+        else:
+            raise ValueError(f"Unknown simulation engine: {engine}")
+
+        if run_segment is not None:
+            for target in self.track.chainages[1:]:
+                if cache is None:
+                    run_segment(target)
+                else:
+                    self.run_cached_segment(cache, engine, target, run_segment)
 
         # After run, compute and display total energy
-        self.energy_consumed_in_run(dt)
+        energy_kwh = self.energy_consumed_in_run(dt)
 
         avg_speed, total_distance, total_time = self.average_corridor_speed()
 
-        # Return detailed log as DataFrame
-        return pd.DataFrame({
-            'Time (s)':self.time_log,
-            'Speed (m/s)':self.speed_log,
-            'Distance':self.distance_log,
-            'Energy (kJ)':self.energy_log,
-            'Average Speed (km/h)': avg_speed * 18 / 5,
-            'Total Distance (km)': total_distance / 1000,
-            'Total Time (min)': total_time / 60
-        })
+        # Hand the log buffers over without a copy; dwell spans stay compact
+        return SimulationResult(
+            *self.log.columns().values(),
+            average_speed=avg_speed * 18 / 5,
+            total_distance=total_distance / 1000,
+            total_time=total_time / 60,
+            energy_kwh=energy_kwh,
+            spans=self.log.spans
+        )
+
+    def run(self, params=None, engine='step', cache=None):
+        """
+        Reset to the first station and simulate a fresh run, optionally with
+        new train parameters. Can be called repeatedly on one simulator.
+        """
+        self.reset(params)
+        return self.simulate(engine=engine, cache=cache)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from speed.profile import gradient_profile, restriction_profile
+
+
+class Track:
+    """
+    Precomputed, read-only description of a corridor: the stations sorted
+    by chainage and the chainage-indexed restriction and gradient profiles.
+    A Track is built once and shared by any number of simulator runs.
+    """
+    def __init__(self, stations: pd.DataFrame, curves: pd.DataFrame = None,
+                 gradients: pd.DataFrame = None, curve_sr: pd.DataFrame = None):
+        self.stations = stations.sort_values('chainage').reset_index(drop=True)
+        self.curves = curves
+        self.gradients = gradients
+        self.curve_sr = curve_sr
+
+        self.chainages = self.stations['chainage'].to_numpy(dtype=float)
+        self.chainages.setflags(write=False)
+
+        # Speed restrictions (m/s) and gradients (fraction, positive rising)
+        self.restrictions = restriction_profile(curves, curve_sr)
+        self.gradient_profile = gradient_profile(gradients)
+
+        # Every chainage where the restriction or the gradient changes
+        self.boundaries = np.unique(np.concatenate(
+            [self.restrictions.starts, self.restrictions.ends,
+             self.gradient_profile.starts, self.gradient_profile.ends]))
+        self.boundaries.setflags(write=False)
+
+    @property
+    def length(self):
+        """Distance between the first and last station (m)."""
+        if not len(self.chainages):
+            return 0.0
+        return float(self.chainages[-1] - self.chainages[0])
+
+    def reversed(self):
+        """
+        The same corridor run in the opposite direction: chainages mirrored
+        so the last station becomes the first, and gradients negated.
+        """
+        origin = float(self.chainages[0] + self.chainages[-1]) if len(self.chainages) else 0.0
+        stations = self.stations.assign(chainage=origin - self.stations['chainage'])
+        curves = self._mirror(self.curves, origin)
+        gradients = self._mirror(self.gradients, origin)
+        if gradients is not None:
+            gradients['gradient'] = -gradients['gradient'].astype(float)
+        return Track(stations, curves, gradients, self.curve_sr)
+
+    @staticmethod
+    def _mirror(table, origin):
+        """Copy of a [start, end] table with both ends mirrored about `origin`."""
+        if table is None:
+            return None
+        return table.assign(start=origin - table['end'], end=origin - table['start'])
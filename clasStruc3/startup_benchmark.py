@@ -0,0 +1,73 @@
+# File: startup_benchmark.py
+# Purpose: Measure the cold start of the compute-only path.
+#
+#   python startup_benchmark.py [--runs N]
+#
+# Reports the wall time of `python main.py --compute-only` (best of N fresh
+# interpreters), the heaviest imports on that path from `-X importtime`, and
+# checks that none of the reporting modules are loaded.
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPORTING_MODULES = ('docx', 'matplotlib', 'xlsxwriter')
+
+# Runs the compute-only path in-process, then lists the reporting modules loaded
+PROBE = f"""
+import io, runpy, sys
+from contextlib import redirect_stdout
+sys.argv = ['main.py', '--compute-only']
+with redirect_stdout(io.StringIO()):
+    runpy.run_path('main.py', run_name='__main__')
+print(','.join(sorted({{m.split('.')[0] for m in sys.modules}} & set({REPORTING_MODULES!r}))))
+"""
+
+
+def cold_start(runs):
+    """Best wall time (s) of the compute-only path in a fresh interpreter."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, 'main.py', '--compute-only'], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def heaviest_imports(count=10):
+    """Top-level packages by cumulative import time (s) on the compute path."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE],
+                          capture_output=True, text=True, check=True)
+    totals = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        # Top-level entries are the ones without nesting indentation
+        if name == name.lstrip() and '.' not in name:
+            totals[name] = totals.get(name, 0) + int(cumulative) / 1e6
+    loaded = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ''
+    return sorted(totals.items(), key=lambda item: -item[1])[:count], loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute-only cold start benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    best = cold_start(args.runs)
+    imports, loaded = heaviest_imports()
+
+    print(f"Compute-only cold start: {best:.3f} s (best of {args.runs})")
+    print("Heaviest imports:")
+    for name, seconds in imports:
+        print(f"  {name:<24} {seconds:.3f} s")
+    print(f"Reporting modules loaded: {loaded or 'none'}")
+
+
+if __name__ == '__main__':
+    main()